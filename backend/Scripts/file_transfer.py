@@ -1,26 +1,62 @@
-"This Script is for transfering the files between the Rasperry Pi and local computer for Git" 
+"This Script is for transfering the files between the Rasperry Pi and local computer for Git"
+import fnmatch
+import hashlib
+import json
 import os
-import paramiko
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from stat import S_ISDIR
 
-def connect_ssh(host, port, username, password):
+import paramiko
+
+MANIFEST_NAME = ".sync-manifest.json"
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "file_transfer.json")
+DEFAULT_EXCLUDE = ["__pycache__", "*.pyc", ".git", "node_modules", MANIFEST_NAME]
+# Data written by the running board (archive, journal, tournaments, players): only exists
+# up to date on the Pi, so an upload never overwrites or deletes it and --delete never removes it
+DEFAULT_PROTECT = ["Games", "Tournaments", "Player"]
+
+
+def connect_ssh(host, port, username, password=None, key_filename=None, compress=False):
     ssh = paramiko.SSHClient()
     ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    ssh.connect(host, port=port, username=username, password=password)
+    ssh.connect(host, port=port, username=username, password=password,
+                key_filename=key_filename, compress=compress)
     return ssh
 
-def sftp_copy_dir(sftp, local_dir, remote_dir, upload=True):
+
+def sftp_makedirs(sftp, remote_path):
+    """Create a remote directory including parents; only 'already exists' is ignored."""
+    if remote_path in ("", "/", "."):
+        return
+    try:
+        if S_ISDIR(sftp.stat(remote_path).st_mode):
+            return
+        raise IOError(f"{remote_path} exists and is not a directory")
+    except FileNotFoundError:
+        pass
+    sftp_makedirs(sftp, posixpath.dirname(remote_path))
+    sftp.mkdir(remote_path)
+
+
+def sftp_copy_dir(sftp, local_dir, remote_dir, upload=True, exclude=DEFAULT_EXCLUDE, protect=DEFAULT_PROTECT):
+    """Full copy of a directory tree (every file, no change detection).
+
+    Paths matching 'exclude' are skipped in both directions, paths matching
+    'protect' are never overwritten on upload (same rules as sync()).
+    """
     if upload:
         # Upload from local to remote
+        skip = list(exclude) + list(protect)
         for root, dirs, files in os.walk(local_dir):
-            rel_path = os.path.relpath(root, local_dir)
-            remote_path = os.path.join(remote_dir, rel_path).replace("\\", "/")
-            try:
-                sftp.mkdir(remote_path)
-            except IOError:
-                pass  # Already exists
+            rel_path = os.path.relpath(root, local_dir).replace("\\", "/")
+            dirs[:] = [d for d in dirs if not is_excluded(posixpath.join(rel_path, d), skip)]
+            remote_path = posixpath.normpath(posixpath.join(remote_dir, rel_path))
+            sftp_makedirs(sftp, remote_path)
             for file in files:
-                sftp.put(os.path.join(root, file), f"{remote_path}/{file}")
+                if not is_excluded(posixpath.join(rel_path, file), skip):
+                    sftp.put(os.path.join(root, file), f"{remote_path}/{file}")
     else:
         # Download from remote to local
         def recursive_get(remote_path, local_path):
@@ -28,38 +64,268 @@ def sftp_copy_dir(sftp, local_dir, remote_dir, upload=True):
             for item in sftp.listdir_attr(remote_path):
                 remote_item_path = f"{remote_path}/{item.filename}"
                 local_item_path = os.path.join(local_path, item.filename)
+                if is_excluded(item.filename, exclude):
+                    continue
                 if S_ISDIR(item.st_mode):
                     recursive_get(remote_item_path, local_item_path)
                 else:
                     sftp.get(remote_item_path, local_item_path)
         recursive_get(remote_dir, local_dir)
 
-def main():
-    host = "192.168.1.2"
-    port = 22
-    username = "bobby-fischer"
-    password = "ultrafreshekiwi"
-
-    # Lokaler und Remote-Pfad
-    local_folder = "C:/Users/i40011981/OneDrive - Endress+Hauser/Desktop/azubiprojekt-2023-digitales-schachbrett/backend/chess-logic"
-    remote_folder = "/home/bobby-fischer/Desktop/azubiprojekt"  # Zielverzeichnis auf dem Pi
-
-    direction = input("Wähle Richtung (upload/download): ").strip().lower()
-
-    ssh = connect_ssh(host, port, username, password)
-    sftp = ssh.open_sftp()
-
-    if direction == "upload":
-        print(f"Lade {local_folder} → {remote_folder} hoch ...")
-        sftp_copy_dir(sftp, local_folder, remote_folder, upload=True)
-    elif direction == "download":
-        print(f"Lade {remote_folder} → {local_folder} herunter ...")
-        sftp_copy_dir(sftp, local_folder, remote_folder, upload=False)
+
+def is_excluded(rel_path, exclude):
+    return any(fnmatch.fnmatch(part, pattern) for part in rel_path.split("/") for pattern in exclude)
+
+
+def sha256_file(handle):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: handle.read(1 << 16), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LocalTree:
+    """Directory on this computer. Manifest: {relative path: {size, mtime, sha256}}."""
+
+    def __init__(self, root, exclude=DEFAULT_EXCLUDE):
+        self.root = root
+        self.exclude = exclude
+
+    def manifest(self):
+        entries = {}
+        for root, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if not is_excluded(d, self.exclude)]
+            for file in files:
+                path = os.path.join(root, file)
+                rel_path = os.path.relpath(path, self.root).replace("\\", "/")
+                if is_excluded(rel_path, self.exclude):
+                    continue
+                stat = os.stat(path)
+                with open(path, "rb") as handle:
+                    entries[rel_path] = {"size": stat.st_size, "mtime": int(stat.st_mtime), "sha256": sha256_file(handle)}
+        return entries
+
+    def local_path(self, rel_path):
+        return os.path.join(self.root, *rel_path.split("/"))
+
+    def remove(self, rel_path):
+        os.remove(self.local_path(rel_path))
+
+
+class SftpTree:
+    """Directory on the Pi, accessed through one or more SFTP channels.
+
+    The manifest is stored next to the files after every sync. Files whose size
+    and mtime still match it are not hashed again; all other files are hashed
+    remotely with sha256sum (or, if exec is unavailable, by reading them).
+
+    Args:
+        open_sftp (callable): Returns a new paramiko.SFTPClient (one per worker thread).
+        root (str): Remote directory.
+        ssh (paramiko.SSHClient, optional): Used for remote hashing via exec.
+    """
+
+    def __init__(self, open_sftp, root, ssh=None, exclude=DEFAULT_EXCLUDE):
+        self.open_sftp = open_sftp
+        self.root = root.rstrip("/") or "/"
+        self.ssh = ssh
+        self.exclude = exclude
+        self.sftp = open_sftp()
+
+    def _walk(self, rel_dir=""):
+        remote_dir = posixpath.join(self.root, rel_dir) if rel_dir else self.root
+        try:
+            items = self.sftp.listdir_attr(remote_dir)
+        except FileNotFoundError:
+            return
+        for item in items:
+            rel_path = posixpath.join(rel_dir, item.filename) if rel_dir else item.filename
+            if is_excluded(rel_path, self.exclude):
+                continue
+            if S_ISDIR(item.st_mode):
+                yield from self._walk(rel_path)
+            else:
+                yield rel_path, item
+
+    def load_stored_manifest(self):
+        try:
+            with self.sftp.open(posixpath.join(self.root, MANIFEST_NAME), "r") as handle:
+                return json.loads(handle.read())
+        except (IOError, ValueError):
+            return {}
+
+    def store_manifest(self, manifest):
+        sftp_makedirs(self.sftp, self.root)
+        with self.sftp.open(posixpath.join(self.root, MANIFEST_NAME), "w") as handle:
+            handle.write(json.dumps(manifest))
+
+    def _hash_remote(self, rel_paths):
+        hashes = {}
+        if self.ssh is not None and rel_paths:
+            command = "cd " + _quote(self.root) + " && sha256sum -- " + " ".join(_quote(p) for p in rel_paths)
+            try:
+                _, stdout, _ = self.ssh.exec_command(command)
+                for line in stdout.read().decode().splitlines():
+                    digest, _, rel_path = line.partition("  ")
+                    hashes[rel_path] = digest
+            except paramiko.SSHException:
+                hashes = {}
+        for rel_path in rel_paths:
+            if rel_path not in hashes:
+                with self.sftp.open(posixpath.join(self.root, rel_path), "rb") as handle:
+                    hashes[rel_path] = sha256_file(handle)
+        return hashes
+
+    def manifest(self):
+        stored = self.load_stored_manifest()
+        entries = {}
+        to_hash = []
+        for rel_path, attr in self._walk():
+            entry = {"size": attr.st_size, "mtime": int(attr.st_mtime)}
+            known = stored.get(rel_path)
+            if known and known["size"] == entry["size"] and known["mtime"] == entry["mtime"]:
+                entry["sha256"] = known["sha256"]
+            else:
+                to_hash.append(rel_path)
+            entries[rel_path] = entry
+        hashes = self._hash_remote(to_hash)
+        for rel_path in to_hash:
+            entries[rel_path]["sha256"] = hashes[rel_path]
+        return entries
+
+    def remote_path(self, rel_path):
+        return posixpath.join(self.root, rel_path)
+
+    def remove(self, rel_path):
+        self.sftp.remove(self.remote_path(rel_path))
+
+
+def _quote(value):
+    return "'" + value.replace("'", "'\\''") + "'"
+
+
+def changed_files(source_manifest, target_manifest):
+    """Relative paths whose content differs (or which are missing) on the target."""
+    return sorted(
+        rel_path for rel_path, entry in source_manifest.items()
+        if target_manifest.get(rel_path, {}).get("sha256") != entry["sha256"]
+    )
+
+
+def sync(local, remote, upload=True, workers=4, delete=False, dry_run=False, protect=DEFAULT_PROTECT):
+    """Incremental sync: transfer only files whose SHA-256 differs, over parallel SFTP channels.
+
+    Paths matching 'protect' are never deleted, and on upload never overwritten.
+
+    Returns:
+        list[str]: Transferred relative paths.
+    """
+    local_manifest = local.manifest()
+    remote_manifest = remote.manifest()
+    source, target = (local_manifest, remote_manifest) if upload else (remote_manifest, local_manifest)
+    changed = changed_files(source, target)
+    if upload:
+        changed = [rel_path for rel_path in changed if not is_excluded(rel_path, protect)]
+    obsolete = sorted(rel_path for rel_path in set(target) - set(source)
+                      if not is_excluded(rel_path, protect)) if delete else []
+
+    for rel_path in changed:
+        print(f"  {'→' if upload else '←'} {rel_path}")
+    for rel_path in obsolete:
+        print(f"  ✗ {rel_path}")
+    if dry_run:
+        return changed
+
+    # Directories are created once up front, not per worker
+    if upload:
+        for directory in sorted({posixpath.dirname(remote.remote_path(p)) for p in changed}):
+            sftp_makedirs(remote.sftp, directory)
     else:
+        for rel_path in changed:
+            os.makedirs(os.path.dirname(local.local_path(rel_path)), exist_ok=True)
+
+    channels = threading.local()
+
+    def transfer(rel_path):
+        # Every worker thread uses its own SFTP channel on the shared connection
+        if not hasattr(channels, "sftp"):
+            channels.sftp = remote.open_sftp()
+        if upload:
+            attr = channels.sftp.put(local.local_path(rel_path), remote.remote_path(rel_path))
+            return rel_path, {"size": attr.st_size, "mtime": int(attr.st_mtime), "sha256": source[rel_path]["sha256"]}
+        channels.sftp.get(remote.remote_path(rel_path), local.local_path(rel_path))
+        return rel_path, None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(transfer, changed))
+
+    for rel_path in obsolete:
+        (remote if upload else local).remove(rel_path)
+
+    # Remember what the Pi now contains, so the next run does not hash unchanged files
+    if upload:
+        for rel_path, entry in results:
+            remote_manifest[rel_path] = entry
+        for rel_path in obsolete:
+            remote_manifest.pop(rel_path, None)
+    remote.store_manifest(remote_manifest)
+    return [rel_path for rel_path, _ in results]
+
+
+def load_config(path):
+    """Read connection and path settings; the password may also come from SFTP_PASSWORD."""
+    with open(path) as file:
+        config = json.load(file)
+    config.setdefault("port", 22)
+    config.setdefault("workers", 4)
+    config.setdefault("compress", True)
+    config.setdefault("exclude", DEFAULT_EXCLUDE)
+    config.setdefault("protect", DEFAULT_PROTECT)
+    config["password"] = os.environ.get("SFTP_PASSWORD", config.get("password"))
+    return config
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Dateien zwischen Raspberry Pi und lokalem Rechner synchronisieren.")
+    parser.add_argument("direction", nargs="?", choices=["upload", "download"])
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="JSON mit host, port, username, password/key_filename, local_folder, remote_folder")
+    parser.add_argument("--full", action="store_true", help="Alle Dateien kopieren (ohne Änderungserkennung)")
+    parser.add_argument("--delete", action="store_true", help="Dateien löschen, die es auf der Quellseite nicht mehr gibt")
+    parser.add_argument("--dry-run", action="store_true", help="Nur anzeigen, was übertragen würde")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    local_folder = config["local_folder"]
+    remote_folder = config["remote_folder"]
+
+    direction = args.direction or input("Wähle Richtung (upload/download): ").strip().lower()
+    if direction not in ("upload", "download"):
         print("Ungültige Eingabe. Bitte 'upload' oder 'download' eingeben.")
+        return
 
-    sftp.close()
-    ssh.close()
+    ssh = connect_ssh(config["host"], config["port"], config["username"], config.get("password"),
+                      config.get("key_filename"), config["compress"])
+    try:
+        if args.full:
+            sftp = ssh.open_sftp()
+            if direction == "upload":
+                print(f"Lade {local_folder} → {remote_folder} hoch ...")
+                sftp_copy_dir(sftp, local_folder, remote_folder, upload=True,
+                              exclude=config["exclude"], protect=config["protect"])
+            else:
+                print(f"Lade {remote_folder} → {local_folder} herunter ...")
+                sftp_copy_dir(sftp, local_folder, remote_folder, upload=False, exclude=config["exclude"])
+            sftp.close()
+        else:
+            local = LocalTree(local_folder, config["exclude"])
+            remote = SftpTree(ssh.open_sftp, remote_folder, ssh=ssh, exclude=config["exclude"])
+            transferred = sync(local, remote, upload=direction == "upload", workers=config["workers"],
+                               delete=args.delete, dry_run=args.dry_run, protect=config["protect"])
+            print(f"{len(transferred)} Datei(en) {'geändert' if args.dry_run else 'übertragen'}.")
+    finally:
+        ssh.close()
     print("Done.")
 
 if __name__ == "__main__":
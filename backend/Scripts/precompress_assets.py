@@ -0,0 +1,44 @@
+"Generates .gz and .br files next to every compressible file of the frontend build (dist)"
+import gzip
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always generated
+    brotli = None
+
+COMPRESSIBLE = (".html", ".js", ".css", ".svg", ".json", ".txt", ".map", ".ico")
+MIN_SIZE = 256  # Small files are not worth it
+
+
+def precompress(dist_dir):
+    count = 0
+    for root, _, files in os.walk(dist_dir):
+        for file in files:
+            if not file.endswith(COMPRESSIBLE):
+                continue
+            path = os.path.join(root, file)
+            with open(path, "rb") as handle:
+                data = handle.read()
+            if len(data) < MIN_SIZE:
+                continue
+
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                with open(path + ".gz", "wb") as handle:
+                    handle.write(compressed)
+                count += 1
+
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    with open(path + ".br", "wb") as handle:
+                        handle.write(compressed)
+                    count += 1
+    return count
+
+
+if __name__ == "__main__":
+    dist = sys.argv[1] if len(sys.argv) > 1 else "dist"
+    print(f"{precompress(dist)} komprimierte Dateien in {dist} erzeugt.")
@@ -0,0 +1,183 @@
+"Load test: starts the backend with a simulated board and connects many /ws spectators"
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "digital-chessboard", "src")
+
+
+class ClientStats:
+    def __init__(self):
+        self.latencies = []
+        self.received = 0
+        self.missed = 0
+        self.reconnects = 0
+        self.errors = 0
+        self.last_version = None
+
+
+async def spectator(url, stats, duration, slow_delay=0.0, drop_probability=0.0):
+    """One /ws client. Latency = receive time - server timestamp, loss = gaps in 'version'."""
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        try:
+            async with websockets.connect(url, max_queue=None) as ws:
+                while time.time() < deadline:
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), timeout=max(0.1, deadline - time.time()))
+                    except asyncio.TimeoutError:
+                        break
+                    now = time.time()
+                    message = json.loads(raw)
+                    if "version" not in message:
+                        continue  # highlight / ack messages
+
+                    version = message["version"]
+                    if stats.last_version is not None and version > stats.last_version + 1:
+                        stats.missed += version - stats.last_version - 1
+                    if stats.last_version is None or version > stats.last_version:
+                        stats.last_version = version
+                        stats.received += 1
+                        if message.get("timestamp"):
+                            stats.latencies.append(now - message["timestamp"])
+
+                    if slow_delay:
+                        await asyncio.sleep(slow_delay)
+                    if drop_probability and random.random() < drop_probability:
+                        stats.reconnects += 1
+                        break
+        except (OSError, websockets.WebSocketException):
+            stats.errors += 1
+            await asyncio.sleep(0.2)
+
+
+def read_process_usage(pid):
+    """(cpu seconds, rss bytes) of a process from /proc (Linux / Raspberry Pi)."""
+    try:
+        with open(f"/proc/{pid}/stat") as file:
+            fields = file.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        cpu = (int(fields[11]) + int(fields[12])) / ticks
+        rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+        return cpu, rss
+    except (OSError, IndexError, ValueError):
+        return None, None
+
+
+def wait_for_server(base_url, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + "/api", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server nicht erreichbar")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run_clients(args, ws_url):
+    stats = [ClientStats() for _ in range(args.clients)]
+    tasks = []
+    for i, client_stats in enumerate(stats):
+        slow = args.slow_delay if i < args.slow_clients else 0.0
+        drop = args.drop_probability if i >= args.clients - args.dropping_clients else 0.0
+        tasks.append(spectator(ws_url, client_stats, args.duration, slow, drop))
+        if args.ramp:
+            await asyncio.sleep(args.ramp / args.clients)
+    await asyncio.gather(*tasks)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket-Lasttest mit simuliertem Brett.")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30.0, help="Sekunden")
+    parser.add_argument("--move-interval", type=float, default=0.5, help="Sekunden zwischen synthetischen Zügen")
+    parser.add_argument("--slow-clients", type=int, default=0, help="Anzahl langsamer Clients")
+    parser.add_argument("--slow-delay", type=float, default=1.0, help="Verzögerung pro Nachricht langsamer Clients")
+    parser.add_argument("--dropping-clients", type=int, default=0, help="Anzahl Clients, die Verbindungen abbrechen")
+    parser.add_argument("--drop-probability", type=float, default=0.05)
+    parser.add_argument("--ramp", type=float, default=2.0, help="Sekunden, über die sich die Clients verbinden")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Ergebnis als JSON speichern (zum Vergleich zwischen Commits)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, SIMULATED_BOARD="1", SIM_MOVE_INTERVAL=str(args.move_interval))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning"],
+        cwd=SRC_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_for_server(base_url)
+        request = urllib.request.Request(base_url + "/api/start_game", method="POST")
+        urllib.request.urlopen(request, timeout=5).close()
+
+        cpu_before, _ = read_process_usage(server.pid)
+        started = time.time()
+        stats = asyncio.run(run_clients(args, f"ws://127.0.0.1:{args.port}/ws"))
+        elapsed = time.time() - started
+        cpu_after, rss = read_process_usage(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    latencies = [latency for client in stats for latency in client.latencies]
+    received = sum(client.received for client in stats)
+    missed = sum(client.missed for client in stats)
+    result = {
+        "commit": git_commit(),
+        "machine": platform.machine(),
+        "clients": args.clients,
+        "duration": round(elapsed, 1),
+        "move_interval": args.move_interval,
+        "slow_clients": args.slow_clients,
+        "dropping_clients": args.dropping_clients,
+        "messages_received": received,
+        "messages_missed": missed,
+        "loss_ratio": round(missed / (received + missed), 4) if received + missed else None,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+            "p50": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+            "p95": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+            "p99": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+            "max": round(max(latencies) * 1000, 2) if latencies else None,
+        },
+        "reconnects": sum(client.reconnects for client in stats),
+        "connection_errors": sum(client.errors for client in stats),
+        "server_cpu_percent": round((cpu_after - cpu_before) / elapsed * 100, 1) if cpu_before is not None and cpu_after is not None else None,
+        "server_rss_mb": round(rss / 2**20, 1) if rss else None,
+    }
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
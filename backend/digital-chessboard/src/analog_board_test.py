@@ -26,4 +26,5 @@ try:
 except KeyboardInterrupt:
     led_controller.clear()
     logger.log_error("Gameloop abgebrochen durch Tasteneingabe. ")
+    logger.flush()
     GPIO.cleanup()
\ No newline at end of file
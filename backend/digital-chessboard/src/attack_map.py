@@ -0,0 +1,83 @@
+""" Attack / threat map of a position, computed once with python-chess bitboards """
+from typing import NamedTuple
+
+import chess
+
+from board_geometry import BoardGeometry
+
+# Overlay colors (RGB) from the perspective of one side. They pass through the gamma LUT of
+# EffectLibrary (gamma 2.8): channel values below ~60 end up almost or completely dark
+HANGING_COLOR = (255, 0, 0)        # own piece attacked and not defended
+CONTESTED_COLOR = (255, 160, 0)    # own piece attacked but defended
+DEFENDED_COLOR = (0, 255, 0)       # own piece defended, not attacked
+THREATENED_COLOR = (140, 0, 0)     # empty square attacked by the opponent (dim red)
+
+
+class AttackMap(NamedTuple):
+    """ Bitmasks (bit i = python-chess square i, a1 = bit 0) for both sides.
+
+    attacks: squares attacked by the side's pieces (pseudo-legal, pins ignored)
+    attacked: own pieces attacked by the opponent
+    defended: own pieces covered by another own piece
+    hanging: attacked and not defended
+    """
+    white_attacks: int
+    black_attacks: int
+    white_attacked: int
+    black_attacked: int
+    white_defended: int
+    black_defended: int
+    white_hanging: int
+    black_hanging: int
+
+    def to_dict(self) -> dict:
+        """ Masks as 16-digit hex strings (64-bit integers do not fit into a JavaScript number) """
+        return {field: f"{mask:016x}" for field, mask in self._asdict().items()}
+
+    def side(self, color: chess.Color) -> tuple[int, int, int, int, int]:
+        """ (own attacks, opponent attacks, attacked, defended, hanging) of one side """
+        if color == chess.WHITE:
+            return self.white_attacks, self.black_attacks, self.white_attacked, self.white_defended, self.white_hanging
+        return self.black_attacks, self.white_attacks, self.black_attacked, self.black_defended, self.black_hanging
+
+
+def compute_attack_map(board: chess.Board) -> AttackMap:
+    attacks = {chess.WHITE: 0, chess.BLACK: 0}
+    for square, piece in board.piece_map().items():
+        attacks[piece.color] |= board.attacks_mask(square)
+
+    masks = {}
+    for color in chess.COLORS:
+        own = board.occupied_co[color]
+        attacked = own & attacks[not color]
+        defended = own & attacks[color]
+        masks[color] = (attacked, defended, attacked & ~defended)
+
+    return AttackMap(
+        attacks[chess.WHITE], attacks[chess.BLACK],
+        masks[chess.WHITE][0], masks[chess.BLACK][0],
+        masks[chess.WHITE][1], masks[chess.BLACK][1],
+        masks[chess.WHITE][2], masks[chess.BLACK][2],
+    )
+
+
+def overlay_colors(attack_map: AttackMap, color: chess.Color, geometry: BoardGeometry,
+                   occupied: int) -> list[tuple[int, int, int]]:
+    """ One color per LED cell (cell = y * width + x) showing the threats for 'color' """
+    _, opponent_attacks, attacked, defended, hanging = attack_map.side(color)
+    threatened = opponent_attacks & ~occupied
+
+    colors = []
+    for index in geometry.square_index:
+        bit = 1 << index
+        if hanging & bit:
+            colors.append(HANGING_COLOR)
+        elif attacked & bit:
+            colors.append(CONTESTED_COLOR)
+        elif defended & bit:
+            colors.append(DEFENDED_COLOR)
+        elif threatened & bit:
+            colors.append(THREATENED_COLOR)
+        else:
+            colors.append((0, 0, 0))
+    return colors
@@ -0,0 +1,103 @@
+""" Board geometry: precomputed tables between sensor cells, chess squares, LED indices and square names """
+from functools import lru_cache
+
+# python-chess numbers squares a1=0 ... h8=63, i.e. 8 squares per rank
+_FILES = 8
+
+
+class Square():
+    """Sensor position (x = column, y = row from the top / rank 8).
+
+    Squares are interned: Square(x, y) always returns the same object for the
+    same coordinates, so scans allocate nothing and equality is an identity check.
+    """
+    __slots__ = ("x_position", "y_position", "_hash")
+    _instances = {}
+
+    def __new__(cls, x_position: int, y_position: int):
+        key = (x_position, y_position)
+        square = cls._instances.get(key)
+        if square is None:
+            square = super().__new__(cls)
+            square.x_position = x_position
+            square.y_position = y_position
+            square._hash = hash(key)
+            cls._instances[key] = square
+        return square
+
+    def __eq__(self, other):
+        return self is other
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # Keep interning intact when Squares are pickled (e.g. between processes)
+        return (Square, (self.x_position, self.y_position))
+
+    def __repr__(self):
+        return f"Square({self.x_position}, {self.y_position})"
+
+
+class BoardGeometry:
+    """Lookup tables for a board of width x height sensor cells.
+
+    A cell is addressed as 'cell = y * width + x'. Sensor (0, 0) is always a8,
+    so smaller rigs cover the upper left corner of a chessboard (the 3x3 test
+    rig is a8-c6). LED indices follow the snake wiring of the strip (every odd
+    column runs backwards).
+
+    Attributes:
+        squares (list[Square]): Square per cell.
+        square_index (list[int]): python-chess square index per cell.
+        led_index (list[int]): Position on the LED strip per cell.
+        square_name (list[str]): Square name ('a8') per cell.
+    """
+
+    def __init__(self, width: int, height: int, snake: bool = True):
+        if not 0 < width <= _FILES or not 0 < height <= _FILES:
+            raise ValueError(f"Unsupported board size {width}x{height}")
+        self.width = width
+        self.height = height
+        self.cell_count = width * height
+
+        self.squares = []
+        self.square_index = []
+        self.led_index = []
+        self.square_name = []
+        for y in range(height):
+            for x in range(width):
+                index = (_FILES - 1 - y) * _FILES + x
+                led_y = height - 1 - y if snake and x % 2 == 1 else y
+                self.squares.append(Square(x, y))
+                self.square_index.append(index)
+                self.led_index.append(x * height + led_y)
+                self.square_name.append(chr(ord('a') + x) + str(_FILES - y))
+
+        # Reverse lookups
+        self._index_by_square = dict(zip(self.squares, self.square_index))
+        self._cell_by_index = {index: cell for cell, index in enumerate(self.square_index)}
+
+    def cell(self, x: int, y: int) -> int:
+        return y * self.width + x
+
+    def index_of(self, square: Square) -> int:
+        """Sensor Square -> python-chess square index."""
+        return self._index_by_square[square]
+
+    def square_of(self, index: int) -> Square | None:
+        """python-chess square index -> sensor Square (None if outside the board)."""
+        cell = self._cell_by_index.get(index)
+        return None if cell is None else self.squares[cell]
+
+    def led_of(self, x: int, y: int) -> int:
+        return self.led_index[y * self.width + x]
+
+    def name_of(self, x: int, y: int) -> str:
+        return self.square_name[y * self.width + x]
+
+
+@lru_cache(maxsize=None)
+def get_geometry(width: int = 8, height: int = 8) -> BoardGeometry:
+    """Shared geometry instance per board size."""
+    return BoardGeometry(width, height)
@@ -1,5 +1,5 @@
 """ Detect Moves and parse to Chess UCI """
-from multiplexing import Square
+from board_geometry import Square, get_geometry
 from fen_methods import FenAnalysis
 
 class BoardProcessor():
@@ -11,10 +11,11 @@ class BoardProcessor():
             "a1": "R", "b1": "N", "c1": "B", "d1": "Q", "e1": "K", "f1": "B", "g1": "N", "h1": "R"
         }
         self.current_board_dict = self.starting_map_dict.copy()
+        self.geometry = get_geometry(8, 8)
 
     def index_to_square(self, row: int, column: int) -> str:
         """0,0 -> 'a8'; 7,7 -> 'h1'"""
-        return chr(ord('a') + column) + str(8 - row)
+        return self.geometry.name_of(column, row)
 
     """ Generates a valid FEN String from the input and converted sensor data """
     def generate_fen_from_sensor_data(self, squares: list[Square]) -> str:
@@ -0,0 +1,82 @@
+""" Versioned board snapshot shared by SSE and long-poll spectators """
+import asyncio
+from typing import Callable
+
+
+class BoardSnapshotStream:
+    """Holds the latest serialized board state and wakes all waiters once per update.
+
+    The board is serialized once per move in ``publish``; every spectator then
+    receives the same prebuilt JSON string. All waiters block on one shared
+    ``asyncio.Condition`` instead of owning a WebSocket each.
+
+    Attributes:
+        version (int): Monotonic counter, incremented on every published board.
+        data (str): JSON encoded board information of the current version.
+    """
+
+    def __init__(self, initial_data: str = "{}"):
+        self.version = 0
+        self.data = initial_data
+        self._condition = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Condition lazily bound to the running event loop (created on first use)
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def publish(self, build: Callable[[int], str]) -> tuple[int, str]:
+        """Store a new snapshot and wake every waiting spectator.
+
+        ``build(version)`` serializes the board for the new version. It is called
+        under the lock, so the embedded version always matches the stored one even
+        if several publishes wait for the lock. Must be called from the event loop.
+        Returns the new (version, data) pair.
+        """
+        condition = self._get_condition()
+        async with condition:
+            version = self.version + 1
+            data = build(version)
+            self.version = version
+            self.data = data
+            condition.notify_all()
+        return version, data
+
+    def snapshot(self) -> tuple[int, str]:
+        """Return the current (version, data) pair without waiting."""
+        return self.version, self.data
+
+    async def wait_for_update(self, since: int, timeout: float) -> tuple[int, str]:
+        """Wait until a version newer than ``since`` exists or the timeout expires.
+
+        Returns the current (version, data) pair in both cases, so the caller can
+        compare the version with ``since`` to tell a timeout from an update.
+        A ``since`` ahead of the current version (client still holds a version
+        from before a server restart) is stale and answered immediately.
+        """
+        if self.version != since:
+            return self.snapshot()
+
+        condition = self._get_condition()
+        try:
+            async with condition:
+                await asyncio.wait_for(condition.wait_for(lambda: self.version != since), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.snapshot()
+
+    async def events(self, since: int = 0, heartbeat: float = 15.0):
+        """Async generator yielding Server-Sent-Event frames for every new version.
+
+        A comment line is sent as heartbeat when nothing changed, which keeps
+        proxies and the Pi's hotspot from dropping idle connections.
+        """
+        last_version = since
+        while True:
+            version, data = await self.wait_for_update(last_version, heartbeat)
+            if version == last_version:
+                yield ": keep-alive\n\n"
+                continue
+            last_version = version
+            yield f"id: {version}\nevent: board\ndata: {data}\n\n"
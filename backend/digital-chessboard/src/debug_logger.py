@@ -1,16 +1,138 @@
-""" Static Class to provide default log messages. """
+""" Default log messages, written asynchronously by a background thread. """
+import collections
+import struct
+import sys
+import threading
+import time
+
+# One sensor frame in the ring buffer: timestamp (double) + occupancy bitmask (uint64)
+FRAME_FORMAT = struct.Struct("<dQ")
+
+
+class _LogWriter:
+    """Background thread that drains log records to the output stream.
+
+    Records are handed over through a deque (append/popleft are atomic), so the
+    caller never waits for stdout or journald.
+    """
+
+    def __init__(self, stream=None, interval: float = 0.05):
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self.records = collections.deque(maxlen=10000)
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def put(self, line: str) -> None:
+        self.records.append(line)
+
+    def flush(self) -> None:
+        lines = []
+        while True:
+            try:
+                lines.append(self.records.popleft())
+            except IndexError:
+                break
+        if lines:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                # Logging must never take the application down
+                pass
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> _LogWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = _LogWriter()
+    return _writer
+
 
 class DebugLogger:
-    def __init__(self, enable_debug: bool = True):
+    """Structured, rate-limited logger.
+
+    Sensor frames are only logged when they change and are additionally kept
+    as (timestamp, bitmask) pairs in a binary ring buffer of the last
+    'frame_buffer_size' frames, which can be dumped on demand.
+    """
+
+    def __init__(self, enable_debug: bool = True, frame_buffer_size: int = 1024,
+                 repeat_interval: float = 1.0):
         self.enabled = enable_debug
+        self.repeat_interval = repeat_interval
+
+        self.frame_buffer_size = frame_buffer_size
+        self.frame_buffer = bytearray(FRAME_FORMAT.size * frame_buffer_size)
+        self.frame_count = 0
+        self.last_mask = None
+
+        # formatted line (level, message and fields) -> (last time written, suppressed repeats)
+        self._recent = {}
+
+    def _write(self, level: str, message: str, fields: dict) -> None:
+        body = f"[{level}] {message}"
+        if fields:
+            body += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+
+        # Only identical lines are suppressed, e.g. the same FEN field must not hide the next one
+        now = time.time()
+        last = self._recent.get(body)
+        if last is not None and now - last[0] < self.repeat_interval:
+            self._recent[body] = (last[0], last[1] + 1)
+            return
+        suppressed = last[1] if last else 0
+        self._recent[body] = (now, 0)
+        if len(self._recent) > 1000:
+            self._recent.clear()
+
+        line = f"{time.strftime('%H:%M:%S', time.localtime(now))}.{int(now % 1 * 1000):03d} {body}"
+        if suppressed:
+            line += f" (+{suppressed} repeated)"
+        _get_writer().put(line)
 
     def log_debounced_result(self, squares: list):
-        if self.enabled:
-            print(f"[DEBOUNCED]        → Stable: {squares}")
+        """Record a sensor frame; it is only written to the log when it changed."""
+        mask = 0
+        for square in squares:
+            mask |= 1 << (square.y_position * 8 + square.x_position)
+
+        FRAME_FORMAT.pack_into(self.frame_buffer, (self.frame_count % self.frame_buffer_size) * FRAME_FORMAT.size,
+                               time.time(), mask)
+        self.frame_count += 1
 
-    def log_event(self, message: str):
+        if mask != self.last_mask:
+            self.last_mask = mask
+            if self.enabled:
+                self._write("DEBOUNCED", f"→ Stable: {squares}", {"mask": f"{mask:016x}"})
+
+    def log_event(self, message: str, **fields):
         if self.enabled:
-            print(f"[EVENT] {message}")
+            self._write("EVENT", message, fields)
+
+    def log_error(self, message: str, **fields):
+        self._write("ERROR", message, fields)
+
+    def dump_frames(self) -> list[tuple[float, int]]:
+        """Return the buffered sensor frames (oldest first) as (timestamp, bitmask)."""
+        count = min(self.frame_count, self.frame_buffer_size)
+        start = self.frame_count - count
+        return [
+            FRAME_FORMAT.unpack_from(self.frame_buffer, (i % self.frame_buffer_size) * FRAME_FORMAT.size)
+            for i in range(start, self.frame_count)
+        ]
 
-    def log_error(self, message: str):
-        print(f"[ERROR] {message}")
+    def flush(self):
+        """Write all pending records now (e.g. before shutdown)."""
+        _get_writer().flush()
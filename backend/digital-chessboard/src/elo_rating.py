@@ -0,0 +1,125 @@
+""" Elo rating updates (single game) and vectorized recomputation over the game archive """
+import numpy as np
+
+from game_archive import GameArchive
+
+K_FACTOR = 32
+DEFAULT_RATING = 1200
+
+RESULT_SCORES = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+
+def expected_score(rating_a: float, rating_b: float) -> float:
+    """Expected score of player A against player B."""
+    return 1.0 / (1.0 + 10 ** ((rating_b - rating_a) / 400.0))
+
+
+def update_ratings(white_rating: float, black_rating: float, white_score: float,
+                   k_factor: float = K_FACTOR) -> tuple[int, int]:
+    """Return the new (white, black) ratings after one game.
+
+    Args:
+        white_rating (float): Rating of white before the game.
+        black_rating (float): Rating of black before the game.
+        white_score (float): 1.0 win, 0.5 draw, 0.0 loss (from white's view).
+        k_factor (float, optional): Elo K-factor. Defaults to K_FACTOR.
+    """
+    delta = k_factor * (white_score - expected_score(white_rating, black_rating))
+    return round(white_rating + delta), round(black_rating - delta)
+
+
+def _independent_batches(white: np.ndarray, black: np.ndarray):
+    """Split games (in chronological order) into consecutive batches in which
+    no player appears twice.
+
+    Inside such a batch the games do not influence each other, so they can be
+    rated at once while giving exactly the same result as a game-by-game loop.
+    """
+    start = 0
+    seen = set()
+    for i in range(len(white)):
+        w, b = int(white[i]), int(black[i])
+        if w in seen or b in seen:
+            yield start, i
+            start = i
+            seen = set()
+        seen.add(w)
+        seen.add(b)
+    if start < len(white):
+        yield start, len(white)
+
+
+def recompute_ratings(games: list[dict], initial_ratings: dict[int, float] | None = None,
+                      k_factor: float = K_FACTOR, default_rating: float = DEFAULT_RATING) -> dict[int, int]:
+    """Replay all games in chronological order and compute every player's rating.
+
+    Args:
+        games (list[dict]): Archived games with 'white_id', 'black_id', 'result'
+            and 'timestamp'. Games without both players or with an unknown result are skipped.
+        initial_ratings (dict, optional): Starting rating per player id. Players not
+            contained start at default_rating.
+
+    Returns:
+        dict[int, int]: Final rounded rating per player id.
+    """
+    initial_ratings = initial_ratings or {}
+    rated = [
+        game for game in sorted(games, key=lambda game: game.get("timestamp", 0))
+        if game.get("white_id") is not None and game.get("black_id") is not None
+        and game["white_id"] != game["black_id"] and game.get("result") in RESULT_SCORES
+    ]
+
+    player_ids = sorted(set(initial_ratings) | {g["white_id"] for g in rated} | {g["black_id"] for g in rated})
+    index_of = {player_id: i for i, player_id in enumerate(player_ids)}
+
+    ratings = np.array([initial_ratings.get(player_id, default_rating) for player_id in player_ids], dtype=np.float64)
+    white = np.array([index_of[g["white_id"]] for g in rated], dtype=np.int64)
+    black = np.array([index_of[g["black_id"]] for g in rated], dtype=np.int64)
+    scores = np.array([RESULT_SCORES[g["result"]] for g in rated], dtype=np.float64)
+
+    for start, end in _independent_batches(white, black):
+        w, b = white[start:end], black[start:end]
+        expected = 1.0 / (1.0 + 10.0 ** ((ratings[b] - ratings[w]) / 400.0))
+        delta = k_factor * (scores[start:end] - expected)
+        # Rounded after every game like update_ratings (the CSV stores integers), so a
+        # replay reproduces the live ratings exactly
+        ratings[w] = np.round(ratings[w] + delta)
+        ratings[b] = np.round(ratings[b] - delta)
+
+    return {player_id: int(round(ratings[i])) for player_id, i in index_of.items()}
+
+
+def load_player_ratings(file_path: str) -> list[list[str]]:
+    with open(file_path) as file:
+        return [line.strip().split(",") for line in file if line.strip()]
+
+
+def save_player_ratings(file_path: str, rows: list[list[str]]) -> None:
+    with open(file_path, 'w') as file:
+        for row in rows:
+            file.write(",".join(row) + "\n")
+
+
+#------------------------- Recompute ------------------------- #
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Alle Elo-Zahlen aus dem Spielarchiv neu berechnen.")
+    parser.add_argument("--players", default=r"./Player/player.csv")
+    parser.add_argument("--archive", default=r"./Games/games.jsonl")
+    parser.add_argument("--initial", type=int, default=DEFAULT_RATING, help="Startwert für alle Spieler")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    rows = load_player_ratings(args.players)
+    initial = {int(row[0]): args.initial for row in rows}
+    new_ratings = recompute_ratings(list(GameArchive(args.archive).iter_games()), initial,
+                                    default_rating=args.initial)
+
+    for row in rows:
+        old = row[2]
+        row[2] = str(new_ratings.get(int(row[0]), args.initial))
+        print(f"{row[1]}: {old} -> {row[2]}")
+
+    if not args.dry_run:
+        save_player_ratings(args.players, rows)
@@ -0,0 +1,235 @@
+""" Post-game analysis: annotate archived games with blunders, mistakes and accuracy """
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+
+import chess
+import chess.engine
+import chess.polyglot
+
+from game_archive import GameArchive
+
+analysis_path = r"./Games/analysis.jsonl"
+position_cache_path = r"./Games/position_cache.csv"
+
+MATE_SCORE = 10000
+
+# Centipawn loss thresholds (from the view of the player who moved)
+INACCURACY = 50
+MISTAKE = 100
+BLUNDER = 300
+
+# Engine instance of the current worker process
+_engine = None
+_limit = None
+
+
+def _init_worker(engine_path: str, depth: int) -> None:
+    """Start one UCI engine per worker process (called once by the pool)."""
+    global _engine, _limit
+    _engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+    _limit = chess.engine.Limit(depth=depth)
+    # Quit the engine when the worker process shuts down
+    Finalize(_engine, _engine.quit, exitpriority=10)
+
+
+def _evaluate_position(item: tuple[int, str]) -> tuple[int, int]:
+    """Evaluate one FEN and return (zobrist_key, centipawns from white's view)."""
+    key, fen = item
+    info = _engine.analyse(chess.Board(fen), _limit)
+    return key, info["score"].white().score(mate_score=MATE_SCORE)
+
+
+def truncate_torn_line(path: str) -> None:
+    """Cut a line left incomplete by an interruption, so the next append starts on a new line."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as file:
+        size = file.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            file.seek(start)
+            block = file.read(end - start)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                valid_size = start + newline + 1
+                break
+            end = start
+        else:
+            valid_size = 0
+        if valid_size != size:
+            file.truncate(valid_size)
+
+
+def win_percent(centipawns: int) -> float:
+    """Winning chance in percent for a centipawn evaluation."""
+    return 50 + 50 * (2 / (1 + math.exp(-0.00368208 * centipawns)) - 1)
+
+
+def move_accuracy(win_before: float, win_after: float) -> float:
+    """Accuracy of a single move in percent based on the drop of winning chances."""
+    accuracy = 103.1668 * math.exp(-0.04354 * max(0.0, win_before - win_after)) - 3.1669
+    return min(100.0, max(0.0, accuracy))
+
+
+def classify(loss: int) -> str | None:
+    if loss >= BLUNDER:
+        return "blunder"
+    if loss >= MISTAKE:
+        return "mistake"
+    if loss >= INACCURACY:
+        return "inaccuracy"
+    return None
+
+
+def game_positions(game: dict) -> list[tuple[int, str]]:
+    """Replay a game and return (zobrist_key, fen) for the start and every ply."""
+    board = chess.Board(game["starting_fen"])
+    positions = [(chess.polyglot.zobrist_hash(board), board.fen())]
+    for uci in game["moves"]:
+        board.push_uci(uci)
+        positions.append((chess.polyglot.zobrist_hash(board), board.fen()))
+    return positions
+
+
+def annotate_game(game: dict, positions: list[tuple[int, str]], evaluations: dict[int, int]) -> dict:
+    """Build the annotation record of a game from the cached evaluations."""
+    turn = chess.Board(game["starting_fen"]).turn
+    moves = []
+    stats = {
+        "white": {"blunder": 0, "mistake": 0, "inaccuracy": 0, "accuracy": []},
+        "black": {"blunder": 0, "mistake": 0, "inaccuracy": 0, "accuracy": []},
+    }
+
+    for ply, uci in enumerate(game["moves"]):
+        sign = 1 if turn == chess.WHITE else -1
+        before = sign * evaluations[positions[ply][0]]
+        after = sign * evaluations[positions[ply + 1][0]]
+        loss = max(0, before - after)
+        label = classify(loss)
+
+        color = "white" if turn == chess.WHITE else "black"
+        if label:
+            stats[color][label] += 1
+        stats[color]["accuracy"].append(move_accuracy(win_percent(before), win_percent(after)))
+        moves.append({"ply": ply + 1, "move": uci, "eval": evaluations[positions[ply + 1][0]],
+                      "loss": loss, "label": label})
+        turn = not turn
+
+    for color in stats:
+        values = stats[color]["accuracy"]
+        stats[color]["accuracy"] = round(sum(values) / len(values), 1) if values else None
+
+    return {"game_id": game["game_id"], "players": stats, "moves": moves}
+
+
+class AnalysisPipeline:
+    """Streams archived games through a process pool of local engines.
+
+    Positions are deduplicated across all games by their Zobrist hash; each
+    unique position is evaluated once and stored in an append-only cache file.
+    Finished annotations are appended one game at a time, so an interrupted run
+    resumes with the first game that has no annotation yet.
+    """
+
+    def __init__(self, engine_path: str = "stockfish", depth: int = 14, workers: int | None = None,
+                 archive: GameArchive | None = None, output_path: str = analysis_path,
+                 cache_path: str = position_cache_path, chunk_size: int = 16):
+        self.engine_path = engine_path
+        self.depth = depth
+        self.workers = workers or os.cpu_count() or 1
+        self.archive = archive or GameArchive()
+        self.output_path = output_path
+        self.cache_path = cache_path
+        self.chunk_size = chunk_size
+        self.evaluations = self._load_cache()
+
+    def _load_cache(self) -> dict[int, int]:
+        evaluations = {}
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path) as file:
+                for line in file:
+                    parts = line.strip().split(",")
+                    # A line cut off by an interruption is simply evaluated again
+                    if len(parts) == 3 and parts[2] == "ok":
+                        evaluations[int(parts[0])] = int(parts[1])
+        return evaluations
+
+    def finished_game_ids(self) -> set[int]:
+        finished = set()
+        if os.path.exists(self.output_path):
+            with open(self.output_path) as file:
+                for line in file:
+                    try:
+                        finished.add(json.loads(line)["game_id"])
+                    except (ValueError, KeyError):
+                        continue
+        return finished
+
+    def _pending_chunks(self):
+        finished = self.finished_game_ids()
+        chunk = []
+        for game in self.archive.iter_games():
+            if game["game_id"] in finished:
+                continue
+            chunk.append(game)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def run(self) -> int:
+        """Analyse all games without annotation. Returns the number of annotated games."""
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # A torn last line would otherwise be glued to the next record ("123" + "456,78,ok")
+        truncate_torn_line(self.cache_path)
+        truncate_torn_line(self.output_path)
+
+        annotated = 0
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.engine_path, self.depth)) as pool, \
+                open(self.cache_path, 'a') as cache_file, \
+                open(self.output_path, 'a') as output_file:
+
+            for chunk in self._pending_chunks():
+                chunk_positions = [game_positions(game) for game in chunk]
+
+                # Only positions never seen before (in any game) go to the pool
+                missing = {}
+                for positions in chunk_positions:
+                    for key, fen in positions:
+                        if key not in self.evaluations:
+                            missing[key] = fen
+
+                for key, centipawns in pool.map(_evaluate_position, missing.items(), chunksize=8):
+                    self.evaluations[key] = centipawns
+                    cache_file.write(f"{key},{centipawns},ok\n")
+                cache_file.flush()
+
+                for game, positions in zip(chunk, chunk_positions):
+                    output_file.write(json.dumps(annotate_game(game, positions, self.evaluations)) + "\n")
+                    output_file.flush()
+                    annotated += 1
+                    print(f"[Analyse] Spiel {game['game_id']} annotiert")
+
+        return annotated
+
+
+#------------------------- Batch-Analyse ------------------------- #
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Archivierte Spiele mit einer lokalen Engine analysieren.")
+    parser.add_argument("--engine", default="stockfish", help="Pfad zur UCI-Engine")
+    parser.add_argument("--depth", type=int, default=14)
+    parser.add_argument("--workers", type=int, default=None, help="Standard: alle CPU-Kerne")
+    args = parser.parse_args()
+
+    count = AnalysisPipeline(args.engine, args.depth, args.workers).run()
+    print(f"{count} Spiele analysiert.")
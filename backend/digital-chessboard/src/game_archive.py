@@ -0,0 +1,59 @@
+""" Archive of finished games (one JSON object per line) """
+import json
+import os
+import time
+
+archive_path = r"./Games/games.jsonl"
+
+
+class GameArchive:
+    """Append-only store of finished games.
+
+    Each line is one game with the players, the result in PGN notation
+    ("1-0", "0-1", "1/2-1/2"), the starting FEN and the moves in UCI.
+    Games are appended when they end, so the file is in chronological order.
+    """
+
+    def __init__(self, path: str = archive_path):
+        self.path = path
+
+    def append(self, white_id: int | None, black_id: int | None, result: str,
+               starting_fen: str, moves: list[str]) -> dict:
+        """Append a finished game to the archive and return the stored record."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        record = {
+            "game_id": self._next_game_id(),
+            "timestamp": time.time(),
+            "white_id": white_id,
+            "black_id": black_id,
+            "result": result,
+            "starting_fen": starting_fen,
+            "moves": moves,
+        }
+        with open(self.path, 'a') as file:
+            file.write(json.dumps(record) + "\n")
+        return record
+
+    def iter_games(self):
+        """Yield all archived games in the order they were stored."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as file:
+            for line in file:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    def _next_game_id(self) -> int:
+        last_id = 0
+        for game in self.iter_games():
+            last_id = max(last_id, game["game_id"])
+        return last_id + 1
+
+
+def outcome_to_result(winner: bool | None) -> str:
+    """Convert chess.Outcome.winner (True/False/None) into a PGN result string."""
+    return {True: "1-0", False: "0-1", None: "1/2-1/2"}[winner]
@@ -2,14 +2,33 @@ import chess
 import sys
 import time
 import threading
-from multiplexing import Multiplexer, Square
-from led_interface import LED
+from typing import NamedTuple, TYPE_CHECKING
+from attack_map import AttackMap, compute_attack_map, overlay_colors
+from board_geometry import Square, get_geometry
+from debug_logger import DebugLogger
+
+if TYPE_CHECKING:
+    # Only for type hints, so the simulated board runs without the hardware libraries
+    from multiplexing import Multiplexer
+    from led_interface import LED
+
+class PlySnapshot(NamedTuple):
+    """ Unveränderlicher Stand nach einem Halbzug (ply 0 = Startstellung) """
+    ply: int
+    fen: str
+    status: str  # ongoing / check / checkmate / stalemate / draw
+    move: str | None  # Zug in UCI, der zu dieser Stellung geführt hat
+    clock: float  # Zeitstempel des Zuges
+
 
 # Encapsulate functions later
 class GameManager:
-    def __init__(self, multiplexer: Multiplexer, led_controller: LED): 
+    def __init__(self, multiplexer: "Multiplexer", led_controller: "LED"): 
         self.multiplexer = multiplexer
         self.led_controller = led_controller
+        self.logger = DebugLogger(enable_debug=True)
+        # Chess logic always works on the full 8x8 board
+        self.geometry = get_geometry(8, 8)
 
         self.previous_state = set()
         #self.current_fen = chess.STARTING_FEN
@@ -27,53 +46,169 @@ class GameManager:
         # Structure: { 'from': Square, 'to': Square, 'removed': bool, 'placed': bool }
         self.castling_pending = None
 
+        self.starting_fen = self.current_fen
+        self.white_player_id = None
+        self.black_player_id = None
+        # Color of the remote (WebSocket) player: chess.WHITE / chess.BLACK, None = no remote player
+        self.remote_color = None
+        self.game_over_callback = None
+        # Optional MoveJournal for crash recovery
+        self.journal = None
+
+        # Position waiting to be replicated on the physical board (remote move or takeback):
+        # set of Squares that must be occupied once the pieces were moved
+        self.board_sync_pending = None
+        # Legal moves (UCI) of the current position, recomputed with every board change (frozenset,
+        # read by the event loop without the lock)
+        self.legal_uci_moves = frozenset()
+        # Attack map of the current position, recomputed with every board change (immutable,
+        # so the event loop reads it without the lock); LED overlay built on demand, None = not built
+        self.attack_map = None
+        self.attack_overlay_cache = None
+        self.attack_overlay = False
+        # Board mutations from the poll thread and the websocket (remote moves)
+        self.lock = threading.Lock()
+        # Pause after a move, taken by the poll loop outside of the lock
+        self.settle_delay = 0.0
+        self.update_position_cache()
+        # Poll interval: faster while a piece is in hand (focused scan)
+        self.poll_interval = 0.1
+        self.focus_active = False
+        # history[ply] = PlySnapshot, O(1) access to every position of the game
+        self.history = [self._snapshot(None)]
+
     def set_board_update(self, callback):
         self.board_update = callback
 
     def set_highlight_callback(self, callback):
         self.highlight_callback = callback
 
-    def start(self):
+    def set_game_over_callback(self, callback):
+        """ callback(outcome: chess.Outcome) wird einmal pro beendetem Spiel aufgerufen """
+        self.game_over_callback = callback
+
+    def set_journal(self, journal):
+        """ Jeder Zug, jede Zurücknahme und Start/Ende werden im Journal festgehalten """
+        self.journal = journal
+
+    def start(self, white_player_id: int | None = None, black_player_id: int | None = None,
+              remote_color: bool | None = None):
         """ Start Gameloop im Thread """
         # hier noch in starting_fen ändern!
         # self.current_fen = "k7/6R1/8/7R/8/8/8/8 w"
         self.current_fen = "1k3r2/2p1n3/6Q1/b2q4/7B/2N5/1P6/4R1K1"
+        self.starting_fen = self.current_fen
         self.chess_board = chess.Board(self.current_fen)
-        print(self.chess_board)
+        self.update_position_cache()
+        self.board_sync_pending = None
+        self.history = [self._snapshot(None)]
+        self.white_player_id = white_player_id
+        self.black_player_id = black_player_id
+        self.remote_color = remote_color
+        self.logger.log_event(f"[Board]\n{self.chess_board}")
+        if self.journal:
+            self.journal.record_start(self.starting_fen, white_player_id, black_player_id, self.history[0].clock)
 
         self.running = True
         self.led_controller.init_chess_matrix()
         thread = threading.Thread(target=self.poll_loop, daemon=True)
         thread.start()
+
+    def resume(self, game: dict):
+        """ Spiel nach einem Neustart aus dem Journal fortsetzen (Zustand aus MoveJournal.recover) """
+        self.starting_fen = game["starting_fen"]
+        self.chess_board = chess.Board(self.starting_fen)
+        self.history = [self._snapshot(None)._replace(clock=game["clocks"][0])]
+        for uci, clock in zip(game["moves"], game["clocks"][1:]):
+            self.chess_board.push(chess.Move.from_uci(uci))
+            self.history.append(self._snapshot(uci)._replace(clock=clock))
+        self.current_fen = self.chess_board.fen()
+        self.update_position_cache()
+        self.white_player_id = game["white_id"]
+        self.black_player_id = game["black_id"]
+        # The seat token is gone after a restart: remote play has to be started again
+        self.remote_color = None
+        self.selected_square = None
+        self.pending_capture = None
+        self.castling_pending = None
+        self.logger.log_event(f"[Board] wiederhergestellt nach {len(game['moves'])} Halbzügen", fen=self.current_fen)
+
+        self.running = True
+        # Figuren können während des Ausfalls bewegt worden sein: mit dem echten Brett
+        # vergleichen und warten, bis es zur wiederhergestellten Stellung passt
+        self.board_sync_pending = self.occupied_squares()
+        detected_squares = set(self.multiplexer.detect_signal())
+        self.previous_state = detected_squares
+        if detected_squares == self.board_sync_pending:
+            self.board_sync_pending = None
+            self.led_controller.init_chess_matrix()
+        else:
+            self._show_sync_hint(detected_squares)
+        thread = threading.Thread(target=self.poll_loop, daemon=True)
+        thread.start()
     
     def stop(self):
         self.running = False
         self.led_controller.clear()
+        if self.journal:
+            self.journal.record_end()
 
     def poll_loop(self):
-        print("[GameLoop] gestartet.")
+        self.logger.log_event("[GameLoop] gestartet.")
 
         while self.running:
             outcome = self.chess_board.outcome()
             if outcome:
                 winner = outcome.winner  # Check if outcome is not None
-                print(f"[Winner]: { {True: 'White', False: 'Black', None: 'Draw'}[winner] }")
+                self.logger.log_event(f"[Winner]: { {True: 'White', False: 'Black', None: 'Draw'}[winner] }")
                 self.stop()
+                self.led_controller.play_effect(self.led_controller.effects.game_over())
+                if self.game_over_callback:
+                    self.game_over_callback(outcome)
                 break
 
-            detected_squares = set(self.multiplexer.detect_signal())
+            poll_changes = getattr(self.multiplexer, "poll_changes", None)
+            if poll_changes is not None:
+                # Scan process: every published frame in order, so a capture is seen step by step
+                frames = [set(squares) for _, _, squares in poll_changes()]
+            else:
+                frames = [set(self.multiplexer.detect_signal())]
 
-            if detected_squares != self.previous_state:
-                self.handle_change(self.previous_state, detected_squares)
-                self.previous_state = detected_squares
+            for detected_squares in frames:
+                if detected_squares != self.previous_state:
+                    with self.lock:
+                        self.handle_change(self.previous_state, detected_squares)
+                    self.previous_state = detected_squares
 
-            time.sleep(0.1)  # poll rate 100 ms
+            if self.focus_active and not self.selected_square:
+                self.set_scan_focus(None)
+
+            if self.settle_delay:
+                time.sleep(self.settle_delay)
+                self.settle_delay = 0.0
+
+            time.sleep(self.poll_interval)  # poll rate 100 ms, 20 ms while a piece is in hand
     
     def handle_change(self, old_state, new_state):
         removed = list(old_state - new_state)  # get detected square by subtracting new state from old state 
         added = list(new_state - old_state)
         self.opponent_squares = []
 
+        # Remote move: wait until the physical board matches the new position
+        if self.board_sync_pending is not None:
+            if new_state == self.board_sync_pending:
+                self.board_sync_pending = None
+                self.selected_square = None
+                self.pending_capture = None
+                self.led_controller.init_chess_matrix()
+                self._show_attack_overlay()
+                if hasattr(self, 'highlight_callback') and self.highlight_callback:
+                    self.source_square = ""
+                    self.highlight_callback([])
+            else:
+                self._show_sync_hint(new_state)
+            return
+
         # If a castling move was just made, ignore the rook's physical movement
         if self.castling_pending:
             cf = self.castling_pending['from']
@@ -96,6 +231,7 @@ class GameManager:
                     self.pending_capture = None
                     # Re-sync LEDs to board state
                     self.led_controller.init_chess_matrix()
+                    self._show_attack_overlay()
                     # Clear highlights on frontend
                     if hasattr(self, 'highlight_callback') and self.highlight_callback:
                         self.source_square = ""
@@ -106,16 +242,19 @@ class GameManager:
         if len(removed) == 1 and not self.selected_square:
             # Figur wurde aufgenommen
             self.selected_square = removed[0]
-            self.source_square = chess.square_name(self.square_to_index(self.selected_square))
+            self.source_square = self.geometry.name_of(self.selected_square.x_position, self.selected_square.y_position)
 
             self.led_controller.set_color(self.selected_square.x_position, self.selected_square.y_position, (255, 255, 0))
             legal_moves = self.get_legal_moves_from_square(self.square_to_index(self.selected_square)) # list of legal moves for 'removed' piece
+            self.set_scan_focus([self.selected_square] + [
+                self.geometry.square_of(chess.Move.from_uci(legal_move).to_square) for legal_move in legal_moves
+            ])
 
             for legal_move in legal_moves:
                 move = chess.Move.from_uci(legal_move) # convert the UCI move into a chess move object
                 to_square = move.to_square
-                x_coordinate = chess.square_file(to_square)
-                y_coordinate = 7 - chess.square_rank(to_square)
+                target = self.geometry.square_of(to_square)
+                x_coordinate, y_coordinate = target.x_position, target.y_position
 
                 if self.chess_board.piece_at(to_square): # prüft ob dort eine figur steht
                     self.led_controller.set_color(x_coordinate, y_coordinate, (0, 255, 0))
@@ -132,6 +271,7 @@ class GameManager:
             # 1 Figur wird aufgehoben und auf Ausgangsposition zurückgelegt
             self.led_controller.init_chess_matrix()
             self.selected_square = None
+            self._show_attack_overlay()
 
             self.source_square = ""
             self.opponent_squares = []
@@ -212,9 +352,7 @@ class GameManager:
         else:
             return None
 
-        fx, fy = self.index_to_square(r_from)
-        tx, ty = self.index_to_square(r_to)
-        return Square(fx, fy), Square(tx, ty)
+        return self.geometry.square_of(r_from), self.geometry.square_of(r_to)
 
     def make_move(self, from_square, to_square):
         move = chess.Move(
@@ -223,12 +361,13 @@ class GameManager:
         )
 
         if move in self.chess_board.legal_moves:
-            print(f"[Zug] Legal: {move.uci()}")
+            self.logger.log_event(f"[Zug] Legal: {move.uci()}")
             # Determine castling before pushing (board expects pre-push context)
             is_castle = self.chess_board.is_castling(move)
+            is_capture = self.chess_board.is_capture(move)
             rook_plan = self._castling_rook_squares(move) if is_castle else None
 
-            self.chess_board.push(move)
+            self.push_move(move)
 
             # If castling, set pending rook relocation to ignore physical move as a separate turn
             if rook_plan:
@@ -236,25 +375,205 @@ class GameManager:
                 self.castling_pending = { 'from': r_from_sq, 'to': r_to_sq, 'removed': False, 'placed': False }
 
             self.led_controller.init_chess_matrix()
+            self.play_move_effect(to_square, is_capture)
+        else:
+            self.logger.log_event(f"[Zug] Illegal: {move.uci()}")
+
+        self.settle_delay = 0.5
+
+    def set_scan_focus(self, squares: list[Square] | None):
+        """ Nur Ausgangs- und Zielfelder schneller scannen, solange eine Figur in der Hand ist """
+        self.multiplexer.set_focus(squares)
+        self.focus_active = squares is not None
+        self.poll_interval = 0.02 if self.focus_active else 0.1
+
+    def play_move_effect(self, to_square: Square, is_capture: bool):
+        """ Schach: König pulsiert, Schlagen: Zielfeld blinkt (bricht beim nächsten Anheben ab) """
+        effects = self.led_controller.effects
+        if self.chess_board.is_check():
+            king = self.geometry.square_of(self.chess_board.king(self.chess_board.turn))
+            self.led_controller.play_effect(effects.check_pulse(king.x_position, king.y_position))
+        elif is_capture:
+            self.led_controller.play_effect(effects.capture_flash(to_square.x_position, to_square.y_position))
+        else:
+            self._show_attack_overlay()
+
+    def push_move(self, move: chess.Move):
+        """ Zug auf das Board anwenden und alle Clients benachrichtigen (physisch und remote) """
+        self.chess_board.push(move)
+        self.update_position_cache()
+        self.current_fen = self.chess_board.fen()
+        self.history.append(self._snapshot(move.uci()))
+        if self.journal:
+            self.journal.record_move(move.uci(), self.history[-1].clock)
+        self.logger.log_event("[FEN]", fen=self.current_fen)
+
+        # Boardupdate Callback aufrufen
+        if self.board_update:
+            self.board_update(self.current_fen)
+
+    def update_position_cache(self):
+        """ Muss nach jeder Änderung an chess_board aufgerufen werden (unter self.lock bzw. vor dem Poll-Thread).
+        Berechnet die Werte sofort, damit Leser (Event-Loop) ohne Lock auf sie zugreifen können. """
+        self.legal_uci_moves = frozenset(move.uci() for move in self.chess_board.legal_moves)
+        self.attack_map = compute_attack_map(self.chess_board)
+        self.attack_overlay_cache = None
+
+    def get_attack_map(self) -> AttackMap:
+        """ Angriffs-/Bedrohungskarte der aktuellen Stellung (ohne Lock, wird bei jedem Zug neu berechnet) """
+        return self.attack_map
+
+    def set_attack_overlay(self, enabled: bool):
+        """ LED-Overlay der Bedrohungen für die Seite am Zug ein-/ausschalten """
+        with self.lock:
+            self.attack_overlay = enabled
+            if enabled:
+                self._show_attack_overlay()
+            else:
+                self.led_controller.stop_effect()
+
+    def _show_attack_overlay(self):
+        """ Rot = ungedeckt angegriffen, Orange = angegriffen aber gedeckt, Grün = gedeckt.
+        Wird beim Anheben einer Figur (set_color) automatisch ausgeblendet. """
+        if not self.attack_overlay or not self.running or self.selected_square or self.board_sync_pending is not None:
+            return
+        effect = self.attack_overlay_cache
+        if effect is None:
+            board = self.chess_board
+            colors = overlay_colors(self.attack_map, board.turn, self.led_controller.geometry, board.occupied)
+            effect = self.led_controller.effects.layer("attack_overlay", colors)
+            self.attack_overlay_cache = effect
+        self.led_controller.play_effect(effect)
+
+    def get_legal_uci_moves(self) -> frozenset[str]:
+        """ Alle legalen Züge der aktuellen Stellung in UCI (ohne Lock, wird bei jedem Zug neu berechnet) """
+        return self.legal_uci_moves
+
+    def occupied_squares(self) -> set[Square]:
+        """ Felder, die laut chess_board auf dem physischen Brett besetzt sein müssen """
+        square_of = self.geometry.square_of
+        return {square_of(index) for index in chess.SquareSet(self.chess_board.occupied)}
+
+    def apply_remote_move(self, uci: str, check_seat: bool = True) -> tuple[bool, str | None]:
+        """ Zug eines Remote-Gegners anwenden.
+
+        Die LEDs zeigen dem Spieler am Brett, welche Figuren er nachstellen muss:
+        Gelb = Feld räumen, Grün = Figur hinstellen.
+
+        Args:
+            uci (str): Zug in UCI.
+            check_seat (bool): Nur Züge der Remote-Farbe annehmen (aus nur für die Simulation).
+
+        Returns:
+            tuple[bool, str | None]: (angenommen, Grund bei Ablehnung)
+        """
+        with self.lock:
+            if not self.running:
+                return False, "Kein Spiel aktiv"
+            if check_seat and self.remote_color is None:
+                return False, "Kein Remote-Spieler in diesem Spiel"
+            if check_seat and self.chess_board.turn != self.remote_color:
+                return False, "Remote-Spieler ist nicht am Zug"
+            if self.board_sync_pending is not None:
+                return False, "Vorheriger Zug wurde noch nicht auf dem Brett nachgestellt"
+            if self.selected_square or self.castling_pending:
+                return False, "Am Brett wird gerade gezogen"
+            if uci not in self.legal_uci_moves:
+                return False, "Illegaler Zug"
+
+            before_pieces = self.chess_board.piece_map()
+            move = chess.Move.from_uci(uci)
+            self.logger.log_event(f"[Zug] Remote: {uci}")
+            self.push_move(move)
+            self._guide_board_sync(before_pieces)
+            return True, None
+
+    def takeback(self, plies: int = 1) -> tuple[bool, str | None]:
+        """ Die letzten 'plies' Halbzüge zurücknehmen.
+
+        Die LEDs zeigen, wie die Figuren zurückgestellt werden müssen
+        (Gelb = Feld räumen, Grün = Figur hinstellen).
+
+        Returns:
+            tuple[bool, str | None]: (ausgeführt, Grund bei Ablehnung)
+        """
+        with self.lock:
+            if not self.running:
+                return False, "Kein Spiel aktiv"
+            if plies < 1 or plies > len(self.chess_board.move_stack):
+                return False, "Nicht genug Züge zum Zurücknehmen"
+            if self.selected_square:
+                return False, "Am Brett wird gerade gezogen"
+
+            before_pieces = self.chess_board.piece_map()
+            for _ in range(plies):
+                self.chess_board.pop()
+            del self.history[len(self.chess_board.move_stack) + 1:]
+            self.update_position_cache()
             self.current_fen = self.chess_board.fen()
-            print(self.chess_board.fen())
 
-            # Boardupdate Callback aufrufen
+            self.castling_pending = None
+            self.pending_capture = None
+            if self.journal:
+                self.journal.record_takeback(plies)
+            self.logger.log_event(f"[Zug] {plies} Halbzug/Halbzüge zurückgenommen", fen=self.current_fen)
+            self._guide_board_sync(before_pieces)
+
             if self.board_update:
                 self.board_update(self.current_fen)
-        else:
-            print(f"[Zug] Illegal: {move.uci()}")
+            return True, None
+
+    def _guide_board_sync(self, before_pieces: dict):
+        """ Nach einer Änderung ohne physischen Zug (Remote-Zug, Zurücknahme) auf das
+        Nachstellen am Brett warten und die betroffenen Felder beleuchten. """
+        after_pieces = self.chess_board.piece_map()
+        self.board_sync_pending = self.occupied_squares()
 
-        time.sleep(0.5)
+        self.led_controller.init_chess_matrix()
+        for index in before_pieces.keys() - after_pieces.keys():
+            square = self.geometry.square_of(index)
+            self.led_controller.set_color(square.x_position, square.y_position, (255, 255, 0))
+        for index, piece in after_pieces.items():
+            if before_pieces.get(index) != piece:
+                square = self.geometry.square_of(index)
+                self.led_controller.set_color(square.x_position, square.y_position, (0, 255, 0))
+
+    def _show_sync_hint(self, detected_squares: set[Square]):
+        """ Abweichung zwischen Brett und erwarteter Stellung anzeigen:
+        Gelb = Figur steht zu viel da (Feld räumen), Grün = Figur fehlt (hinstellen). """
+        self.led_controller.init_chess_matrix()
+        for square in detected_squares - self.board_sync_pending:
+            self.led_controller.set_color(square.x_position, square.y_position, (255, 255, 0))
+        for square in self.board_sync_pending - detected_squares:
+            self.led_controller.set_color(square.x_position, square.y_position, (0, 255, 0))
+
+    def _snapshot(self, move: str | None) -> PlySnapshot:
+        board = self.chess_board
+        if board.is_checkmate():
+            status = "checkmate"
+        elif board.is_stalemate():
+            status = "stalemate"
+        elif board.is_check():
+            status = "check"
+        elif board.is_insufficient_material():
+            status = "draw"
+        else:
+            status = "ongoing"
+        return PlySnapshot(len(board.move_stack), board.fen(), status, move, time.time())
+
+    def get_position(self, ply: int) -> PlySnapshot | None:
+        """ Snapshot nach Halbzug 'ply' (0 = Startstellung), None wenn es ihn nicht gibt """
+        history = self.history
+        if 0 <= ply < len(history):
+            return history[ply]
+        return None
     
     def square_to_index(self, square: Square) -> int:
-        return chess.square(square.x_position, 7 - square.y_position)
+        return self.geometry.index_of(square)
     
     def index_to_square(self, index: int) -> tuple[int, int]:
-        x = chess.square_file(index)
-        y = 7 - chess.square_rank(index)
-
-        return (x, y)  # Return as a tuple
+        square = self.geometry.square_of(index)
+        return (square.x_position, square.y_position)  # Return as a tuple
     
     def get_current_fen(self) -> str:
         return self.current_fen
@@ -0,0 +1,235 @@
+""" Precomputed LED effects: frames are rendered once into packed strip buffers """
+import colorsys
+import math
+import threading
+
+from board_geometry import BoardGeometry
+
+# Background of the check pulse, as channel value after gamma/brightness correction
+DIM_LEVEL = 6
+
+
+def build_lut(gamma: float = 2.8, brightness: float = 1.0) -> bytes:
+    """Lookup table 0..255 -> gamma corrected and dimmed channel value."""
+    return bytes(
+        min(255, round(((value / 255.0) ** gamma) * 255.0 * brightness))
+        for value in range(256)
+    )
+
+
+class LedEffect:
+    """A finished animation: packed frames in strip byte order plus frame delay.
+
+    Attributes:
+        name (str): Name of the effect.
+        frames (list[bytes]): One buffer of LED_COUNT * 3 bytes per frame.
+        frame_delay (float): Seconds between two frames.
+        loop (bool): Repeat until cancelled (e.g. idle attract mode).
+    """
+
+    def __init__(self, name: str, frames: list[bytes], frame_delay: float, loop: bool = False):
+        self.name = name
+        self.frames = frames
+        self.frame_delay = frame_delay
+        self.loop = loop
+
+
+class EffectLibrary:
+    """Builds and caches the effects for one LED matrix.
+
+    Colors are RGB tuples (0-255). Gamma and global brightness are applied while
+    rendering through a lookup table, so playback only copies buffers.
+    """
+
+    def __init__(self, geometry: BoardGeometry, byteorder: str = "GRB", gamma: float = 2.8,
+                 brightness: float = 1.0):
+        self.geometry = geometry
+        self.byteorder = byteorder
+        self.channel_offsets = tuple(byteorder.index(channel) for channel in "RGB")
+        self.led_count = geometry.cell_count
+        # Built effects of this library by (name, *args); rendered with this instance's LUT and layout
+        self._cache = {}
+        self.set_brightness(brightness, gamma)
+
+    def set_brightness(self, brightness: float, gamma: float = 2.8) -> None:
+        """Change the global brightness; already built effects are rebuilt on next use."""
+        self.gamma = gamma
+        self.brightness = brightness
+        self.lut = build_lut(gamma, brightness)
+        self._cache.clear()
+        # Smallest input value that still reaches DIM_LEVEL at this brightness (low values round to 0)
+        dim = next((value for value in range(256) if self.lut[value] >= DIM_LEVEL), 255)
+        self.dim_color = (dim, dim, dim)
+
+    def contains(self, x: int, y: int) -> bool:
+        return 0 <= x < self.geometry.width and 0 <= y < self.geometry.height
+
+    def correct(self, color: tuple[int, int, int]) -> tuple[int, int, int]:
+        """Apply gamma and brightness to a single RGB color."""
+        lut = self.lut
+        return lut[color[0]], lut[color[1]], lut[color[2]]
+
+    def render(self, colors: list[tuple[int, int, int]]) -> bytes:
+        """Pack one color per cell (cell = y * width + x) into a strip buffer."""
+        buffer = bytearray(self.led_count * 3)
+        lut = self.lut
+        r_offset, g_offset, b_offset = self.channel_offsets
+        for cell, (r, g, b) in enumerate(colors):
+            base = self.geometry.led_index[cell] * 3
+            buffer[base + r_offset] = lut[r]
+            buffer[base + g_offset] = lut[g]
+            buffer[base + b_offset] = lut[b]
+        return bytes(buffer)
+
+    def _cells(self):
+        width = self.geometry.width
+        return [(cell % width, cell // width) for cell in range(self.led_count)]
+
+    # ------------------------- Effects ------------------------- #
+
+    def layer(self, name: str, colors: list[tuple[int, int, int]]) -> LedEffect:
+        """Static picture that stays until cancelled (e.g. an overlay); not cached here."""
+        return LedEffect(name, [self.render(colors)], frame_delay=3600.0, loop=True)
+
+    def rainbow_breathing(self, steps: int = 360, frame_delay: float = 0.02) -> LedEffect:
+        return self._cached_effect("rainbow_breathing", steps, frame_delay)
+
+    def check_pulse(self, x: int, y: int, color=(255, 0, 0), steps: int = 30) -> LedEffect | None:
+        """King square pulses while the rest of the board is dimmed (None if the square has no LED)."""
+        if not self.contains(x, y):
+            return None
+        return self._cached_effect("check_pulse", x, y, color, steps)
+
+    def capture_flash(self, x: int, y: int, color=(255, 255, 255), flashes: int = 3) -> LedEffect | None:
+        """Target square flashes (None if the square has no LED)."""
+        if not self.contains(x, y):
+            return None
+        return self._cached_effect("capture_flash", x, y, color, flashes)
+
+    def game_over(self, color=(255, 215, 0), steps: int = 24) -> LedEffect:
+        """Rings expanding from the center of the board."""
+        return self._cached_effect("game_over", color, steps)
+
+    def idle_attract(self, steps: int = 120, frame_delay: float = 0.04) -> LedEffect:
+        """Diagonal rainbow wave, loops until cancelled."""
+        return self._cached_effect("idle_attract", steps, frame_delay)
+
+    def _cached_effect(self, name: str, *args) -> LedEffect:
+        key = (name, *args)
+        effect = self._cache.get(key)
+        if effect is None:
+            if len(self._cache) >= 64:
+                # Drop the oldest entry, e.g. check_pulse for many different squares
+                del self._cache[next(iter(self._cache))]
+            effect = getattr(self, "_build_" + name)(*args)
+            self._cache[key] = effect
+        return effect
+
+    def _build_rainbow_breathing(self, steps, frame_delay):
+        frames = []
+        for step in range(steps):
+            r, g, b = colorsys.hsv_to_rgb(step / steps, 1.0, 1.0)
+            frames.append(self.render([(int(r * 255), int(g * 255), int(b * 255))] * self.led_count))
+        return LedEffect("rainbow_breathing", frames, frame_delay)
+
+    def _build_check_pulse(self, x, y, color, steps):
+        target = self.geometry.cell(x, y)
+        frames = []
+        for step in range(steps):
+            level = 0.5 - 0.5 * math.cos(2 * math.pi * step / steps)
+            colors = [self.dim_color] * self.led_count
+            colors[target] = tuple(int(channel * level) for channel in color)
+            frames.append(self.render(colors))
+        return LedEffect("check_pulse", frames * 3, 0.03)
+
+    def _build_capture_flash(self, x, y, color, flashes):
+        target = self.geometry.cell(x, y)
+        lit = [(0, 0, 0)] * self.led_count
+        lit[target] = color
+        frames = [self.render(lit), self.render([(0, 0, 0)] * self.led_count)] * flashes
+        return LedEffect("capture_flash", frames, 0.08)
+
+    def _build_game_over(self, color, steps):
+        center_x = (self.geometry.width - 1) / 2
+        center_y = (self.geometry.height - 1) / 2
+        distances = [math.hypot(x - center_x, y - center_y) for x, y in self._cells()]
+        max_distance = max(distances) or 1.0
+        frames = []
+        for step in range(steps):
+            radius = (step / steps) * (max_distance + 1)
+            colors = []
+            for distance in distances:
+                level = max(0.0, 1.0 - abs(distance - radius))
+                colors.append(tuple(int(channel * level) for channel in color))
+            frames.append(self.render(colors))
+        return LedEffect("game_over", frames * 2, 0.05)
+
+    def _build_idle_attract(self, steps, frame_delay):
+        cells = self._cells()
+        span = self.geometry.width + self.geometry.height
+        frames = []
+        for step in range(steps):
+            colors = []
+            for x, y in cells:
+                r, g, b = colorsys.hsv_to_rgb(((x + y) / span + step / steps) % 1.0, 1.0, 0.6)
+                colors.append((int(r * 255), int(g * 255), int(b * 255)))
+            frames.append(self.render(colors))
+        return LedEffect("idle_attract", frames, frame_delay, loop=True)
+
+
+class EffectPlayer:
+    """Plays effects in a background thread by writing prebuilt buffers to the strip.
+
+    Starting an effect cancels the running one; cancel() stops mid-animation.
+
+    Args:
+        write_buffer (callable): Sends one packed frame (bytes) to the strip.
+        on_finish (callable, optional): Called after the effect ended or was cancelled,
+            e.g. to restore the previous pixels.
+    """
+
+    def __init__(self, write_buffer, on_finish=None):
+        self.write_buffer = write_buffer
+        self.on_finish = on_finish
+        self._cancel = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def play(self, effect: LedEffect, blocking: bool = False) -> None:
+        with self._lock:
+            self.cancel()
+            self._cancel = threading.Event()
+            if blocking:
+                self._run(effect, self._cancel)
+                return
+            self._thread = threading.Thread(target=self._run, args=(effect, self._cancel),
+                                            name=f"led-{effect.name}", daemon=True)
+            self._thread.start()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, effect: LedEffect, cancel: threading.Event) -> None:
+        write_buffer = self.write_buffer
+        try:
+            while True:
+                for frame in effect.frames:
+                    if cancel.is_set():
+                        return
+                    write_buffer(frame)
+                    # Event.wait doubles as a cancellable sleep
+                    if cancel.wait(effect.frame_delay):
+                        return
+                if not effect.loop:
+                    return
+        finally:
+            if self.on_finish:
+                self.on_finish()
@@ -1,9 +1,10 @@
 import board
 from rpi_ws281x import *
 import neopixel
+from neopixel_write import neopixel_write
 from multipledispatch import dispatch
-import time
-import colorsys
+from board_geometry import get_geometry
+from led_effects import EffectLibrary, EffectPlayer, LedEffect
 
 class LED:
     """A controller class for managing an LED matrix using NeoPixel strips.
@@ -17,40 +18,70 @@ class LED:
         LED_COUNT (int): Total number of LEDs in the matrix.
         pixels (neopixel.NeoPixel): NeoPixel object for controlling the LED strip.
         active_leds (list): List of currently active LED positions as (x, y) tuples.
+        geometry (BoardGeometry): Precomputed (x, y) -> LED strip index tables.
+        effects (EffectLibrary): Precomputed animations, gamma and brightness tables.
     """
 
-    def __init__(self, WIDTH, HEIGHT):
+    def __init__(self, WIDTH, HEIGHT, brightness=1.0):
         """Initialize the LED matrix controller.
         
         Args:
             width (int): Width of the LED matrix (number of LEDs horizontally).
             height (int): Height of the LED matrix (number of LEDs vertically).
+            brightness (float, optional): Global brightness 0.0-1.0, applied through
+                a lookup table together with gamma correction. Defaults to 1.0.
         """
         self.WIDTH = WIDTH
         self.HEIGHT = HEIGHT
 
         self.LED_COUNT = WIDTH * HEIGHT       
+        self.geometry = get_geometry(WIDTH, HEIGHT)
         self.pixels = neopixel.NeoPixel(board.D18, self.LED_COUNT, brightness=1.0, auto_write=False)
 
         self.active_leds = []
+
+        self.effects = EffectLibrary(self.geometry, byteorder=getattr(self.pixels, "byteorder", "GRB"),
+                                     brightness=brightness)
+        self.effect_player = EffectPlayer(self.__write_buffer, on_finish=self.pixels.show)
+
+    def __write_buffer(self, frame: bytes):
+        """Send a prebuilt frame to the strip as it is (no per-pixel conversion)."""
+        neopixel_write(self.pixels.pin, frame)
+
+    def play_effect(self, effect: LedEffect, blocking=False):
+        """Play a precomputed effect, cancelling the one that is currently running.
         
-    def __map_leds(self, x_position, y_position, snake=True):
-        """Map 2D coordinates to 1D LED strip index.
+        When the effect ends or is cancelled, the previous pixels are shown again.
         
-        This method converts 2D matrix coordinates to the corresponding index in a 1D LED strip.
-        Supports snake pattern for proper matrix mapping.
+        Args:
+            effect (LedEffect | None): Effect from self.effects (e.g. self.effects.check_pulse(4, 7)).
+                None (effect outside the LED matrix) is ignored.
+            blocking (bool, optional): Wait until the effect has finished. Defaults to False.
+
+        Returns:
+            bool: True if the effect was started, False if there was nothing to play.
+        """
+        if effect is None:
+            return False
+        self.effect_player.play(effect, blocking=blocking)
+        return True
+
+    def stop_effect(self):
+        """Cancel the running effect (if any) mid-animation."""
+        if self.effect_player.running:
+            self.effect_player.cancel()
+        
+    def __map_leds(self, x_position, y_position):
+        """Map 2D coordinates to 1D LED strip index (snake wiring, precomputed).
         
         Args:
             x_position (int): X coordinate (horizontal position) in the matrix.
             y_position (int): Y coordinate (vertical position) in the matrix.
-            snake (bool, optional): If True, applies snake pattern for even rows. Defaults to True.
             
         Returns:
             int: The corresponding index in the 1D LED strip.
         """
-        if snake and x_position % 2 == 1:
-            y_position = self.WIDTH - 1 - y_position
-        return x_position * self.WIDTH + y_position
+        return self.geometry.led_index[y_position * self.WIDTH + x_position]
 
 
     def set_color(self, x_position, y_position, color) -> bool:
@@ -67,6 +98,10 @@ class LED:
         Returns:
             bool: True if the operation was successful, False if an error occurred.
         """
+        if not (0 <= x_position < self.WIDTH and 0 <= y_position < self.HEIGHT):
+            return False
+        self.stop_effect()
+        color = self.effects.correct(color)
         try:
             self.active_leds.clear()  # Clear previous active LEDs
             self.active_leds.append((x_position, y_position))
@@ -85,6 +120,8 @@ class LED:
         Args:
             color (tuple): RGB color tuple (r, g, b) with values 0-255.
         """
+        self.stop_effect()
+        color = self.effects.correct(color)
         for i in range (self.LED_COUNT):
             self.pixels[i] = color
             self.pixels.show()
@@ -94,25 +131,19 @@ class LED:
         
         This method creates a smooth rainbow animation that cycles through all hue values,
         creating a breathing effect by changing all LEDs to the same color at each step.
+        The frames are built once and then only copied to the strip.
         
         Args:
             wait_ms (float): Delay in milliseconds between each color change step.
         """
-        steps = 360  # Number of hue steps for a smooth rainbow
-        for step in range(steps):
-            hue = step / steps  # Normalized hue [0,1)
-            r, g, b = colorsys.hsv_to_rgb(hue, 1.0, 1.0)
-            color = (int(r * 255), int(g * 255), int(b * 255))
-            for i in range(self.LED_COUNT):
-                self.pixels[i] = color
-            self.pixels.show()
-            time.sleep(wait_ms / 1000.0)
+        self.play_effect(self.effects.rainbow_breathing(360, wait_ms / 1000.0), blocking=True)
 
     def clear(self):
         """Clear all LEDs by setting them to black (off).
         
         This method turns off all LEDs in the matrix by setting their color to black (0,0,0).
         """
+        self.stop_effect()
         for i in range (self.LED_COUNT):
             self.pixels[i] = (0,0,0)
             self.pixels.show()
@@ -127,8 +158,9 @@ class LED:
             color1 (tuple): RGB color tuple for the first color (e.g., white).
             color2 (tuple): RGB color tuple for the second color (e.g., black).
         """
-        color1 = (255, 255, 255)
-        color2 = (0, 0, 255)
+        self.stop_effect()
+        color1 = self.effects.correct((255, 255, 255))
+        color2 = self.effects.correct((0, 0, 255))
 
         for y in range(self.HEIGHT):
             for x in range(self.WIDTH):
@@ -136,6 +168,5 @@ class LED:
                     color = color1
                 else:
                     color = color2
-                index = self.__map_leds(x, y)
-                self.pixels[index] = color
+                self.pixels[self.geometry.led_of(x, y)] = color
         self.pixels.show()
\ No newline at end of file
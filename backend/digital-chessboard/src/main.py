@@ -1,24 +1,68 @@
 """ This Module manages the connected clients and pushes board updates to all clients"""
-from fastapi import FastAPI, WebSocket
+import os
+import sys
+
+if __name__ == "__main__":
+    # Direkt gestartet: an uvicorn übergeben, bevor Hardware initialisiert wird. Sonst würde
+    # der Scan-Prozess (spawn) dieses Skript erneut ausführen und LEDs/GPIO doppelt öffnen.
+    os.execv(sys.executable, [sys.executable, "-m", "uvicorn", "main:app", "--host", "0.0.0.0", "--port", "8000",
+                              "--app-dir", os.path.dirname(os.path.abspath(__file__))])
+
+from fastapi import FastAPI, Header, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 import asyncio
 import json
-from typing import Set
+import secrets
+import time
+from typing import Literal, Set
 
+from board_stream import BoardSnapshotStream
 from debug_logger import DebugLogger
+from elo_rating import update_ratings, RESULT_SCORES
+from game_archive import GameArchive, outcome_to_result
+from move_journal import MoveJournal
+from remote_play import TokenBucket, move_to_uci, MAX_MESSAGE_LENGTH
 from game_manager import GameManager
-from multiplexing import Multiplexer
-from led_interface import LED
+from player_index import PlayerIndex
+from scan_process import ScanProcess
+from static_assets import FrontendAssets
+from tournament import TournamentPlayer, TournamentStore
+
+# SIMULATED_BOARD=1: ohne Hardware starten (Lasttests), SIM_MOVE_INTERVAL > 0 spielt synthetische Züge
+simulated = os.environ.get("SIMULATED_BOARD") == "1"
+if simulated:
+    from simulated_board import SimulatedLED as LED, SimulatedMultiplexer as Multiplexer, SyntheticMoveDriver
+else:
+    from multiplexing import Multiplexer
+    from led_interface import LED
+
+# Simulierte Partien nicht ins echte Spielarchiv schreiben
+game_archive = GameArchive(r"./Games/simulated_games.jsonl" if simulated else r"./Games/games.jsonl")
+move_journal = MoveJournal(r"./Games/simulated_journal" if simulated else r"./Games/journal")
 
 main_event_loop = None
 app = FastAPI()
 connected_clients: Set[WebSocket] = set()
 logger = DebugLogger(enable_debug=True)
+board_stream = BoardSnapshotStream()
+# ply -> (PlySnapshot, JSON); gültig solange der Snapshot derselbe ist (Zurücknahme ersetzt ihn)
+position_cache: dict[int, tuple[object, str]] = {}
 
 # Import Controller Classes and Setup
 led_controller = LED(WIDTH=8, HEIGHT=8)
-mux = Multiplexer(column_pins=[8, 10, 36, 16, 18, 22, 24, 26], row_pins=[29, 31, 7, 11, 13, 15, 19, 23])
+column_pins = [8, 10, 36, 16, 18, 22, 24, 26]
+row_pins = [29, 31, 7, 11, 13, 15, 19, 23]
+# SCAN_PROCESS=1: Sensoren in eigenem Prozess scannen (unabhängig von der Web-Last)
+if os.environ.get("SCAN_PROCESS") == "1" and not simulated:
+    mux = ScanProcess(column_pins=column_pins, row_pins=row_pins)
+# GPIO_BACKEND=registers: Sensoren direkt über /dev/gpiomem lesen (ein Registerzugriff pro Spalte)
+elif os.environ.get("GPIO_BACKEND") == "registers" and not simulated:
+    from register_multiplexer import RegisterMultiplexer
+    mux = RegisterMultiplexer(column_pins=column_pins, row_pins=row_pins)
+else:
+    mux = Multiplexer(column_pins=column_pins, row_pins=row_pins)
 
 origins = [
     "*"
@@ -44,15 +88,18 @@ led_controller.clear()
 game_manager = GameManager(mux, led_controller)
 
 led_controller.set_all_color((0, 0, 0))
-def get_board_information():
+def get_board_information(version: int = 0):
     board = game_manager.chess_board
     return BoardInformation(
+        version=version,
+        timestamp=time.time(),
         fen=board.fen(),
         is_check=board.is_check(),
         is_checkmate=board.is_checkmate(),
         is_stalemate=board.is_stalemate(),
         last_move=board.peek().uci() if board.move_stack else None,
         player_turn='white' if board.turn else 'black',
+        attack_map=game_manager.get_attack_map().to_dict(),
     )
 
 class Move(BaseModel):
@@ -61,13 +108,28 @@ class Move(BaseModel):
     to_square: str
     promotion: str | None = None
 
+class RemoteMove(Move):
+    type: Literal["move"]
+    # Seat token from /api/start_game, only the remote player knows it
+    token: str
+
+class MoveAck(BaseModel):
+    type: str = "move_ack"
+    accepted: bool
+    move: str | None = None
+    reason: str | None = None
+
 class BoardInformation(BaseModel):
+    version: int = 0
+    timestamp: float | None = None
     fen: str
     is_check: bool
     is_checkmate: bool
     is_stalemate: bool
     last_move: str | None = None
     player_turn: str
+    # Bitmasks as hex strings, bit i = square i (a1 = 0), see attack_map.AttackMap
+    attack_map: dict[str, str] | None = None
 
 class GameplayState(BaseModel):
     paused: bool = True
@@ -85,12 +147,57 @@ class Player(BaseModel):
     gamertag: str
     elo: int
 
+class Position(BaseModel):
+    ply: int
+    fen: str
+    status: str
+    move: str | None = None
+    clock: float
+
+class Takeback(BaseModel):
+    plies: int = 1
+
+class AttackOverlay(BaseModel):
+    enabled: bool
+
+class GamePlayers(BaseModel):
+    white_id: int | None = None
+    black_id: int | None = None
+    # Color played over the WebSocket (None = no remote player, only the board moves)
+    remote_color: Literal["white", "black"] | None = None
+
+class TournamentCreate(BaseModel):
+    name: str
+    player_ids: list[int]
+    rounds: int
+
+class TournamentResult(BaseModel):
+    white_id: int
+    black_id: int
+    result: str # 1-0 / 0-1 / 1/2-1/2
+
 file_path = r"./Player/player.csv"
+# Token des Remote-Sitzplatzes im laufenden Spiel (None = keine Remote-Züge)
+remote_token = None
+# Suchindex über alle Spieler, wird bei jeder Änderung der CSV mitgeführt
+player_index = PlayerIndex.from_csv(file_path)
+tournaments = TournamentStore(r"./Tournaments")
+# Gebautes Frontend (dist), wird direkt von diesem Server ausgeliefert
+frontend_assets = FrontendAssets(os.environ.get("FRONTEND_DIST", r"../dist"))
 
 @app.on_event("startup")
 async def startup_event():
     global main_event_loop
     main_event_loop = asyncio.get_running_loop()
+    await board_stream.publish(lambda version: get_board_information(version=version).model_dump_json())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if isinstance(mux, ScanProcess):
+        mux.stop()
+    elif hasattr(mux, "close"):
+        mux.close()
+    move_journal.close()
 
 @app.get("/api") 
 async def api_status():
@@ -109,23 +216,21 @@ async def create_player(input: Player):
     elo = input.elo
 
     # Check if player already exists
-    with open(file_path, 'r') as file:
-        for line in file:
-            existing_id, existing_gamertag, _ = line.strip().split(",")
-            if existing_gamertag == gamertag:
-                return {
-                        "success": False, 
-                        "message": "Player already exists!"
-                    }
-
-            elif existing_id == str(id):
-                return {
-                        "success": False, 
-                        "message": "Player ID already exists!"
-                    }
+    if player_index.has_gamertag(gamertag):
+        return {
+                "success": False, 
+                "message": "Player already exists!"
+            }
+
+    elif player_index.get(id) is not None:
+        return {
+                "success": False, 
+                "message": "Player ID already exists!"
+            }
 
     with open(file_path, 'a') as file:
         file.write(f"{id},{gamertag},{elo}\n")
+    player_index.add(id, gamertag, elo)
 
     return {
         "success": True,
@@ -154,6 +259,7 @@ async def delete_player(player_id: int):
         for line in lines:
             if not line.startswith(f"{player_id},"):
                 file.write(line)
+    player_index.remove(player_id)
     return { 
         "Success": True,
         "message": "Player deleted!"
@@ -162,6 +268,17 @@ async def delete_player(player_id: int):
 @app.put("/api/update_player/{player_id}")
 async def update_player(player_id: int, input: Player):
     """ API Endpoint to update player based off Player ID. """
+    if player_index.get(player_id) is None:
+        return {
+                "Success": False,
+                "message": "Player not found!"
+            }
+    if not player_index.update(player_id, input.gamertag, input.elo):
+        return {
+                "Success": False,
+                "message": "Player already exists!"
+            }
+
     lines = []
     with open(file_path) as file:
         lines = file.readlines()
@@ -178,17 +295,31 @@ async def update_player(player_id: int, input: Player):
             "message": "Player updated!" 
         }
 
+@app.get("/api/players/search", response_model=list[Player])
+async def search_players(q: str, limit: int = 10):
+    """ API Endpoint for search-as-you-type: prefix matches first, then gamertags with typos. """
+    limit = max(1, min(limit, 50))
+    return [Player(id=id, gamertag=gamertag, elo=elo) for id, gamertag, elo in player_index.search(q, limit)]
+
 
 """
     Game Related Endpoints
 """
 
 @app.post("/api/start_game")
-async def start_game():
+async def start_game(players: GamePlayers | None = None):
+    global remote_token
     if not game_manager.running:
-        game_manager.start()
+        players = players or GamePlayers()
+        remote_color = None if players.remote_color is None else players.remote_color == "white"
+        game_manager.start(white_player_id=players.white_id, black_player_id=players.black_id,
+                           remote_color=remote_color)
+        # Neuer Token pro Spiel: nur wer das Spiel gestartet hat, kann ihn an den Remote-Spieler geben
+        remote_token = secrets.token_urlsafe(16) if remote_color is not None else None
+        await broadcast_board_update()
         return {
-            "status": "Game started"
+            "status": "Game started",
+            "remote_token": remote_token,
         }
     else:
         return {
@@ -207,24 +338,128 @@ async def stop_game():
             "status": "Game already stopped."
         }
 
+@app.get("/api/debug/frames")
+async def debug_frames(limit: int = 200):
+    """ Letzte Sensor-Frames aus dem Ringpuffer (Zeitstempel + Belegung als 64-Bit-Maske). """
+    frames = mux.logger.dump_frames()[-limit:]
+    return [{"timestamp": timestamp, "mask": f"{mask:016x}"} for timestamp, mask in frames]
+
+"""
+    Spectator Endpoints (read-only, served from the versioned snapshot)
+"""
+
+@app.get("/api/board")
+async def get_board(since: int | None = None, timeout: float = 25.0):
+    """ Long-poll endpoint: returns as soon as a board newer than 'since' exists.
+
+    Without 'since' the current board is returned immediately. On timeout the
+    unchanged board is returned, the client simply polls again with its version.
+    """
+    if since is None:
+        _, data = board_stream.snapshot()
+    else:
+        _, data = await board_stream.wait_for_update(since, max(0.0, min(timeout, 60.0)))
+    return Response(content=data, media_type="application/json")
+
+@app.get("/api/board/stream")
+async def board_event_stream(last_event_id: str | None = Header(default=None)):
+    """ Server-Sent-Events endpoint pushing every board update to the client. """
+    since = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    return StreamingResponse(
+        board_stream.events(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/position/{ply}")
+async def get_position(ply: int):
+    """ Stellung nach Halbzug 'ply' (0 = Startstellung) zum Durchblättern der Partie. """
+    snapshot = game_manager.get_position(ply)
+    if snapshot is None:
+        return Response(status_code=404)
+
+    cached = position_cache.get(ply)
+    if cached is None or cached[0] is not snapshot:
+        cached = (snapshot, Position(**snapshot._asdict()).model_dump_json())
+        position_cache[ply] = cached
+    return Response(content=cached[1], media_type="application/json")
+
+@app.post("/api/takeback")
+async def takeback(input: Takeback | None = None):
+    """ Letzte Halbzüge zurücknehmen, die LEDs zeigen wie die Figuren zurückgestellt werden. """
+    input = input or Takeback()
+    success, reason = await asyncio.to_thread(game_manager.takeback, input.plies)
+    return {
+        "success": success,
+        "message": reason or "Zug zurückgenommen!"
+    }
+
+@app.get("/api/attack_map")
+async def get_attack_map():
+    """ Angriffskarte der aktuellen Stellung (aus dem Cache, wird einmal pro Stellung berechnet) """
+    return game_manager.get_attack_map().to_dict()
+
+@app.post("/api/attack_overlay")
+async def set_attack_overlay(input: AttackOverlay):
+    """ Bedrohungs-Overlay auf den LEDs ein-/ausschalten, ohne Neuberechnung """
+    await asyncio.to_thread(game_manager.set_attack_overlay, input.enabled)
+    return {"success": True, "enabled": input.enabled}
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     connected_clients.add(websocket)
-    board_info = get_board_information()
-    await websocket.send_text(board_info.model_dump_json())
+    _, data = board_stream.snapshot()
+    rate_limit = TokenBucket(rate=5.0, burst=10)
+    violations = 0
     try:
+        await websocket.send_text(data)
         while True:
-            await websocket.receive_text() 
+            raw = await websocket.receive_text()
+            if not rate_limit.allow():
+                violations += 1
+                if violations >= 20:
+                    # Client flutet den Server -> Verbindung schließen (Policy Violation)
+                    await websocket.close(code=1008)
+                    break
+                continue
+
+            ack = await handle_remote_move(raw)
+            await websocket.send_text(ack.model_dump_json())
     except WebSocketDisconnect:
+        pass
+    finally:
         connected_clients.discard(websocket)
+
+async def handle_remote_move(raw: str) -> "MoveAck":
+    """ Zug eines Remote-Gegners prüfen und über den GameManager anwenden.
+
+    Ungültige Züge werden direkt gegen die gecachten legalen Züge abgelehnt,
+    ohne den GameManager-Lock zu nehmen (das frozenset wird bei jedem Zug ersetzt).
+    """
+    try:
+        if len(raw) > MAX_MESSAGE_LENGTH:
+            raise ValueError("Nachricht zu lang")
+        move = RemoteMove.model_validate_json(raw)
+        uci = move_to_uci(move.from_square, move.to_square, move.promotion)
+    except ValueError as error:
+        return MoveAck(accepted=False, reason=str(error).splitlines()[0])
+
+    # Zuschauer dürfen nicht ziehen: nur mit dem Token des Remote-Sitzplatzes
+    if remote_token is None or not secrets.compare_digest(move.token, remote_token):
+        return MoveAck(accepted=False, move=uci, reason="Kein Remote-Spieler")
+
+    if uci not in game_manager.get_legal_uci_moves():
+        return MoveAck(accepted=False, move=uci, reason="Illegaler Zug")
+
+    accepted, reason = await asyncio.to_thread(game_manager.apply_remote_move, uci)
+    return MoveAck(accepted=accepted, move=uci, reason=reason)
     
 # board_info an alle Clients senden
 async def broadcast_board_update():
-    board_info = get_board_information()
-    data = board_info.model_dump_json()
+    _, data = await board_stream.publish(lambda version: get_board_information(version=version).model_dump_json())
     disconnected = set()
-    for ws in connected_clients:
+    for ws in list(connected_clients):
         try:
             await ws.send_text(data)
         except Exception:
@@ -247,7 +482,7 @@ async def broadcast_highlight_moves(moves):
         "opponent_squares": game_manager.opponent_squares
     })
     disconnected = set()
-    for ws in connected_clients:
+    for ws in list(connected_clients):
         try:
             await ws.send_text(data)
         except Exception:
@@ -260,9 +495,132 @@ def highlight_callback(moves):
     if main_event_loop:
         asyncio.run_coroutine_threadsafe(coroutine, main_event_loop)
 
+# Spiel archivieren und Elo der beiden Spieler anpassen
+async def record_game_result(white_id, black_id, result, starting_fen, moves):
+    game_archive.append(white_id, black_id, result, starting_fen, moves)
+    if white_id is None or black_id is None or white_id == black_id:
+        return
+
+    tournament = tournaments.record_game(white_id, black_id, result)
+    if tournament is not None:
+        logger.log_event(f"Turnierergebnis eingetragen: {tournament.name}", white=white_id, black=black_id, result=result)
+
+    with open(file_path) as file:
+        lines = file.readlines()
+
+    ratings = {}
+    for line in lines:
+        id, _, elo = line.strip().split(",")
+        ratings[int(id)] = int(elo)
+    if white_id not in ratings or black_id not in ratings:
+        logger.log_error(f"Elo-Update übersprungen, Spieler {white_id} oder {black_id} unbekannt")
+        return
+
+    new_white, new_black = update_ratings(ratings[white_id], ratings[black_id], RESULT_SCORES[result])
+    new_ratings = {white_id: new_white, black_id: new_black}
+
+    with open(file_path, 'w') as file:
+        for line in lines:
+            id, gamertag, elo = line.strip().split(",")
+            file.write(f"{id},{gamertag},{new_ratings.get(int(id), elo)}\n")
+            if int(id) in new_ratings:
+                player_index.update(int(id), gamertag, new_ratings[int(id)])
+    logger.log_event(f"Elo aktualisiert: {new_ratings}")
+
+def game_over_callback(outcome):
+    board = game_manager.chess_board
+    coroutine = record_game_result(
+        game_manager.white_player_id,
+        game_manager.black_player_id,
+        outcome_to_result(outcome.winner),
+        game_manager.starting_fen,
+        [move.uci() for move in board.move_stack],
+    )
+    if main_event_loop:
+        asyncio.run_coroutine_threadsafe(coroutine, main_event_loop)
+
 game_manager.set_board_update(board_update_callback)
 game_manager.set_highlight_callback(highlight_callback)
+game_manager.set_game_over_callback(game_over_callback)
+game_manager.set_journal(move_journal)
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=False)
+# Nach einem Absturz / Neustart das laufende Spiel aus Snapshot + Journal wiederherstellen
+recovered_game = move_journal.recover()
+if recovered_game is not None:
+    game_manager.resume(recovered_game)
+
+move_interval = float(os.environ.get("SIM_MOVE_INTERVAL", "0"))
+if simulated and move_interval > 0:
+    synthetic_moves = SyntheticMoveDriver(game_manager, mux, interval=move_interval)
+    synthetic_moves.start()
+
+"""
+    Tournament Endpoints (Schweizer System)
+"""
+
+@app.post("/api/tournaments")
+async def create_tournament(input: TournamentCreate):
+    """ Legt ein Turnier mit den angegebenen registrierten Spielern an. """
+    registered = {player.id: player for player in await get_players()}
+    unknown = [player_id for player_id in input.player_ids if player_id not in registered]
+    if unknown:
+        return {"success": False, "message": f"Unknown players: {unknown}"}
+
+    players = [
+        TournamentPlayer(player_id, registered[player_id].gamertag, registered[player_id].elo)
+        for player_id in dict.fromkeys(input.player_ids)
+    ]
+    try:
+        tournament = tournaments.create(input.name, players, input.rounds)
+    except ValueError as error:
+        return {"success": False, "message": str(error)}
+    return {"success": True, "id": tournament.id}
+
+@app.get("/api/tournaments/{tournament_id}")
+async def get_tournament(tournament_id: int):
+    tournament = tournaments.get(tournament_id)
+    if tournament is None:
+        return Response(status_code=404)
+    return tournament.to_dict()
+
+@app.post("/api/tournaments/{tournament_id}/pair")
+async def pair_tournament_round(tournament_id: int):
+    """ Paart die nächste Runde; die vorherige muss vollständig sein. """
+    tournament = tournaments.get(tournament_id)
+    if tournament is None:
+        return Response(status_code=404)
+    try:
+        pairings = await asyncio.to_thread(tournament.pair_next_round)
+    except ValueError as error:
+        return {"success": False, "message": str(error)}
+    tournaments.save(tournament)
+    return {"success": True, "round": len(tournament.rounds), "pairings": pairings}
+
+@app.post("/api/tournaments/{tournament_id}/result")
+async def record_tournament_result(tournament_id: int, input: TournamentResult):
+    """ Ergebnis einer Partie eintragen, die nicht auf dem Brett gespielt wurde. """
+    tournament = tournaments.get(tournament_id)
+    if tournament is None:
+        return Response(status_code=404)
+    if not tournament.record_result(input.white_id, input.black_id, input.result):
+        return {"success": False, "message": "No open pairing for these players"}
+    tournaments.save(tournament)
+    return {"success": True}
+
+@app.get("/api/tournaments/{tournament_id}/standings")
+async def get_tournament_standings(tournament_id: int):
+    tournament = tournaments.get(tournament_id)
+    if tournament is None:
+        return Response(status_code=404)
+    return tournament.standings()
+
+"""
+    Frontend (muss als letzte Route registriert werden)
+"""
+
+@app.get("/{full_path:path}", include_in_schema=False)
+async def frontend(full_path: str, request: Request):
+    """ Liefert das gebaute Frontend aus (vorkomprimiert, Hash-Assets dauerhaft cachebar). """
+    if full_path.startswith("api/") or not frontend_assets.available:
+        return Response(status_code=404)
+    return frontend_assets.response(request, full_path or "index.html")
@@ -0,0 +1,192 @@
+""" Write-ahead journal of the running game for crash recovery (snapshot + journal tail) """
+import collections
+import json
+import os
+import threading
+import time
+
+journal_dir = r"./Games/journal"
+
+# Every n journal records the full game is written as a snapshot and the journal starts over
+SNAPSHOT_INTERVAL = 32
+
+
+class MoveJournal:
+    """Journal of the active game: start, moves (with clock), takebacks, end.
+
+    record_*() only updates the in-memory state and hands the record to a
+    background thread through a deque, so the move path never waits for the
+    SD card. The thread writes all queued records at once and calls fsync
+    once per batch (every 'interval' seconds at most), i.e. a crash loses at
+    most the last batch. Every SNAPSHOT_INTERVAL records the whole game is
+    written to snapshot.json (atomically) and the journal is truncated, so
+    recovery only has to replay a short tail.
+
+    Files in 'directory':
+        snapshot.json: {"seq", "game"} with game = None or the state dict below
+        journal.jsonl: one record per line, each with a sequence number 'seq'
+
+    State dict: starting_fen, white_id, black_id, moves (UCI), clocks (timestamp
+    per ply, clocks[0] = game start).
+    """
+
+    def __init__(self, directory: str = journal_dir, interval: float = 0.05):
+        self.directory = directory
+        self.interval = interval
+        self.journal_path = os.path.join(directory, "journal.jsonl")
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        os.makedirs(directory, exist_ok=True)
+
+        self.game = None
+        self.seq = 0
+        self.records_since_snapshot = 0
+        self.pending = collections.deque()
+        self.write_lock = threading.Lock()
+        self.file = None
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="move-journal", daemon=True)
+        self.thread.start()
+
+    # ------------------------- Recording (game thread) ------------------------- #
+
+    def record_start(self, starting_fen: str, white_id: int | None, black_id: int | None, clock: float) -> None:
+        self._append({"type": "start", "starting_fen": starting_fen, "white_id": white_id,
+                      "black_id": black_id, "clock": clock})
+
+    def record_move(self, uci: str, clock: float) -> None:
+        self._append({"type": "move", "move": uci, "clock": clock})
+
+    def record_takeback(self, plies: int) -> None:
+        self._append({"type": "takeback", "plies": plies})
+
+    def record_end(self) -> None:
+        if self.game is not None:
+            self._append({"type": "end"})
+
+    def _append(self, record: dict) -> None:
+        self.seq += 1
+        record["seq"] = self.seq
+        self.game = _apply(self.game, record)
+        self.pending.append(("record", record))
+
+        self.records_since_snapshot += 1
+        if self.records_since_snapshot >= SNAPSHOT_INTERVAL or record["type"] == "end":
+            self.records_since_snapshot = 0
+            game = self.game
+            if game is not None:
+                game = dict(game, moves=list(game["moves"]), clocks=list(game["clocks"]))
+            self.pending.append(("snapshot", {"seq": self.seq, "game": game}))
+
+    # ------------------------- Writing (background thread) ------------------------- #
+
+    def flush(self) -> None:
+        """Write and fsync everything queued so far."""
+        with self.write_lock:
+            lines = []
+            while True:
+                try:
+                    kind, item = self.pending.popleft()
+                except IndexError:
+                    break
+                if kind == "record":
+                    lines.append(json.dumps(item))
+                else:
+                    # Snapshot contains every record written before -> journal can start over
+                    self._write_lines(lines)
+                    lines = []
+                    self._write_snapshot(item)
+            self._write_lines(lines)
+
+    def _write_lines(self, lines: list[str]) -> None:
+        if not lines:
+            return
+        if self.file is None:
+            self.file = open(self.journal_path, 'a')
+        self.file.write("\n".join(lines) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _write_snapshot(self, snapshot: dict) -> None:
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(snapshot, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.journal_path, 'w')
+        os.fsync(self.file.fileno())
+
+    def _run(self) -> None:
+        while self.running:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except OSError:
+                # Journal errors must not stop the game; records stay queued for the next try
+                pass
+
+    def close(self) -> None:
+        self.running = False
+        self.flush()
+        with self.write_lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    # ------------------------- Recovery ------------------------- #
+
+    def recover(self) -> dict | None:
+        """Load the snapshot, replay the journal tail and return the active game (or None)."""
+        seq = 0
+        game = None
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path) as file:
+                snapshot = json.load(file)
+            seq, game = snapshot["seq"], snapshot["game"]
+
+        if os.path.exists(self.journal_path):
+            valid_size = 0
+            with open(self.journal_path, 'rb') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # Torn last line of a crash, everything before is valid
+                    if not line.endswith(b"\n"):
+                        break
+                    valid_size += len(line)
+                    if record["seq"] > seq:
+                        game = _apply(game, record)
+                        seq = record["seq"]
+            # Cut off the torn line, otherwise new records would be appended to it
+            if valid_size != os.path.getsize(self.journal_path):
+                os.truncate(self.journal_path, valid_size)
+
+        self.seq = seq
+        self.game = game
+        return game
+
+
+def _apply(game: dict | None, record: dict) -> dict | None:
+    """Apply one journal record to a game state (the state is modified in place)."""
+    kind = record["type"]
+    if kind == "start":
+        return {
+            "starting_fen": record["starting_fen"],
+            "white_id": record["white_id"],
+            "black_id": record["black_id"],
+            "moves": [],
+            "clocks": [record["clock"]],
+        }
+    if kind == "end" or game is None:
+        return None
+    if kind == "move":
+        game["moves"].append(record["move"])
+        game["clocks"].append(record["clock"])
+    elif kind == "takeback":
+        del game["moves"][len(game["moves"]) - record["plies"]:]
+        del game["clocks"][len(game["moves"]) + 1:]
+    return game
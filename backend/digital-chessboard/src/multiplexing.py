@@ -2,22 +2,7 @@
 import RPi.GPIO as GPIO
 import time
 from debug_logger import DebugLogger
-
-class Square():
-    def __init__(self, x_position: int, y_position: int):
-        self.x_position = x_position
-        self.y_position = y_position
-
-    def __eq__(self, other):
-        if isinstance(other, Square):
-            return self.x_position == other.x_position and self.y_position == other.y_position
-        return False
-
-    def __hash__(self):
-        return hash((self.x_position, self.y_position))
-
-    def __repr__(self):
-        return f"Square({self.x_position}, {self.y_position})"
+from board_geometry import Square, get_geometry
 
 class Multiplexer():
 
@@ -26,8 +11,34 @@ class Multiplexer():
         GPIO.setmode(GPIO.BOARD) # Phyical Board Pins
         self.row_pins = row_pins
         self.column_pins = column_pins
+        # Interned Square per (column, row), looked up instead of allocated during scans
+        self.geometry = get_geometry(len(column_pins), len(row_pins))
+        self.cell_squares = [
+            [self.geometry.squares[self.geometry.cell(col_index, row_index)] for row_index in range(len(row_pins))]
+            for col_index in range(len(column_pins))
+        ]
         self.logger = DebugLogger(enable_debug=True)
 
+        # Focused scanning: only these column indices are rescanned (None = full scan)
+        self.focus_columns = None
+        self.full_scan_interval = 0.5  # safety full scan every 500 ms while focused
+        self.last_full_scan = 0.0
+        # Last result per column, used for columns skipped by a focused scan
+        self.column_state = [[] for _ in column_pins]
+
+    def set_focus(self, squares: list[Square] | None) -> None:
+        """Restrict scanning to the columns containing the given squares.
+
+        Used while a piece is in hand: only the origin and the legal destinations
+        can change. A full scan still runs every full_scan_interval seconds.
+        None switches back to full scans.
+        """
+        if squares is None:
+            self.focus_columns = None
+        else:
+            self.focus_columns = sorted({square.x_position for square in squares
+                                         if square.x_position < len(self.column_pins)})
+
     def setup(self) -> None:
         """Configure GPIO for hi-Z column scanning.
 
@@ -49,8 +60,15 @@ class Multiplexer():
         Non-active columns stay INPUT (hi-Z), preventing them from clamping the
         row lines when multiple reed contacts are closed in the same row.
         Includes lightweight majority voting per cell to reduce noise.
+        In focus mode only the focused columns are rescanned, the other
+        columns keep their last result until the next full scan.
         """
-        active_squares = []
+        now = time.monotonic()
+        if self.focus_columns is None or now - self.last_full_scan >= self.full_scan_interval:
+            columns = range(len(self.column_pins))
+            self.last_full_scan = now
+        else:
+            columns = self.focus_columns
 
         # Tuning parameters
         settle_delay = 0.0005   # 500 µs to allow signals to settle
@@ -62,13 +80,15 @@ class Multiplexer():
             for col_pin in self.column_pins:
                 GPIO.setup(col_pin, GPIO.IN)
 
-            for col_index, col_pin in enumerate(self.column_pins):
+            for col_index in columns:
+                col_pin = self.column_pins[col_index]
+                column_active = []
                 # Drive only the active column HIGH
                 GPIO.setup(col_pin, GPIO.OUT)
                 GPIO.output(col_pin, GPIO.HIGH)
                 time.sleep(settle_delay)
 
-                for row_index, row_pin in enumerate(self.row_pins):
+                for row_pin, square in zip(self.row_pins, self.cell_squares[col_index]):
                     high_count = 0
                     for _ in range(samples):
                         if GPIO.input(row_pin):
@@ -76,13 +96,16 @@ class Multiplexer():
                         if samples > 1:
                             time.sleep(inter_sample_delay)
                     if high_count >= (samples // 2 + 1):
-                        active_squares.append(Square(col_index, row_index))
+                        column_active.append(square)
 
                 # Release the column back to hi-Z
                 GPIO.setup(col_pin, GPIO.IN)
+                self.column_state[col_index] = column_active
+
+            active_squares = [square for column_active in self.column_state for square in column_active]
 
-            if active_squares:
-                self.logger.log_debounced_result(active_squares)
+            # Only written to the log when the frame changed, always kept in the ring buffer
+            self.logger.log_debounced_result(active_squares)
 
             return active_squares
 
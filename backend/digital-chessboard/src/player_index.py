@@ -0,0 +1,191 @@
+""" In-memory index over the player store: O(1) lookups, prefix and typo-tolerant gamertag search """
+from debug_logger import DebugLogger
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _prefix_distance(query: str, name: str, limit: int) -> int:
+    """Levenshtein distance between query and the best matching prefix of name.
+
+    Stops early once every cell of a row exceeds limit, so non-matches are cheap.
+    """
+    previous = list(range(len(name) + 1))
+    for i, query_char in enumerate(query, start=1):
+        current = [i]
+        for j, name_char in enumerate(name, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (query_char != name_char)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous)
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = set()
+
+
+class PlayerIndex:
+    """Players by id and gamertag, a trie for prefix search and a trigram index for fuzzy search.
+
+    The index mirrors the player CSV and has to be updated on every change
+    (add / update / remove). Searching is case-insensitive, duplicate checks
+    use the exact gamertag like the CSV. Older CSV files may already contain
+    a gamertag twice: such rows are indexed by id as well, by_gamertag keeps
+    the first owner.
+    """
+
+    def __init__(self):
+        self.players = {}       # id -> (id, gamertag, elo)
+        self.by_gamertag = {}   # gamertag -> id
+        self.root = _TrieNode()
+        self.trigrams = {}      # trigram -> set of ids
+
+    @classmethod
+    def from_csv(cls, file_path: str) -> "PlayerIndex":
+        index = cls()
+        try:
+            with open(file_path) as file:
+                for line in file:
+                    if line.strip():
+                        id, gamertag, elo = line.strip().split(",")
+                        if index.has_gamertag(gamertag):
+                            DebugLogger().log_error(f"Gamertag {gamertag} doppelt in {file_path}",
+                                                    id=id, owner=index.by_gamertag[gamertag])
+                        index._insert(int(id), gamertag, int(elo))
+        except FileNotFoundError:
+            pass
+        return index
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def get(self, player_id: int) -> tuple[int, str, int] | None:
+        return self.players.get(player_id)
+
+    def has_gamertag(self, gamertag: str) -> bool:
+        return gamertag in self.by_gamertag
+
+    def add(self, player_id: int, gamertag: str, elo: int) -> None:
+        owner = self.by_gamertag.get(gamertag)
+        if owner is not None and owner != player_id:
+            raise ValueError(f"Gamertag {gamertag} gehört bereits Spieler {owner}")
+        if player_id in self.players:
+            self.remove(player_id)
+        self._insert(player_id, gamertag, elo)
+
+    def _insert(self, player_id: int, gamertag: str, elo: int) -> None:
+        self.players[player_id] = (player_id, gamertag, elo)
+        self.by_gamertag.setdefault(gamertag, player_id)
+
+        key = gamertag.lower()
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+        node.ids.add(player_id)
+
+        for trigram in _trigrams(key):
+            self.trigrams.setdefault(trigram, set()).add(player_id)
+
+    def update(self, player_id: int, gamertag: str, elo: int) -> bool:
+        """Change an existing player; False if the id is unknown or the gamertag is taken."""
+        existing = self.players.get(player_id)
+        if existing is None:
+            return False
+        if existing[1] == gamertag:
+            self.players[player_id] = (player_id, gamertag, elo)  # only the Elo changed
+            return True
+        if self.by_gamertag.get(gamertag, player_id) != player_id:
+            return False
+        self.add(player_id, gamertag, elo)
+        return True
+
+    def remove(self, player_id: int) -> None:
+        existing = self.players.pop(player_id, None)
+        if existing is None:
+            return
+        gamertag = existing[1]
+        key = gamertag.lower()
+        path = [self.root]
+        for char in key:
+            path.append(path[-1].children[char])
+        path[-1].ids.discard(player_id)
+
+        if self.by_gamertag.get(gamertag) == player_id:
+            # Hand the gamertag over to a duplicate from the CSV, if there is one
+            owners = [other for other in path[-1].ids if self.players[other][1] == gamertag]
+            if owners:
+                self.by_gamertag[gamertag] = min(owners)
+            else:
+                del self.by_gamertag[gamertag]
+        # Prune empty branches so the trie does not grow with deleted names
+        for depth in range(len(key), 0, -1):
+            node = path[depth]
+            if node.ids or node.children:
+                break
+            del path[depth - 1].children[key[depth - 1]]
+
+        for trigram in _trigrams(key):
+            ids = self.trigrams.get(trigram)
+            if ids is not None:
+                ids.discard(player_id)
+                if not ids:
+                    del self.trigrams[trigram]
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[int, str, int]]:
+        """Prefix matches first (shortest names first), then typo-tolerant matches."""
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        results = self._prefix_ids(query, limit)
+        if len(results) < limit:
+            seen = set(results)
+            results.extend(player_id for player_id in self._fuzzy_ids(query, limit) if player_id not in seen)
+        return [self.players[player_id] for player_id in results[:limit]]
+
+    def _prefix_ids(self, query: str, limit: int) -> list[int]:
+        node = self.root
+        for char in query:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        # Breadth-first: shorter (closer) names are found first
+        ids = []
+        level = [node]
+        while level and len(ids) < limit:
+            next_level = []
+            for current in level:
+                ids.extend(sorted(current.ids))
+                next_level.extend(current.children[char] for char in sorted(current.children))
+            level = next_level
+        return ids[:limit]
+
+    def _fuzzy_ids(self, query: str, limit: int) -> list[int]:
+        if len(query) < 3:
+            return []  # Too short to tell a typo from a different name
+        # One typo per four characters, at least one
+        max_distance = max(1, len(query) // 4)
+
+        # Candidates: players sharing trigrams with the query, most shared first
+        counts = {}
+        for trigram in _trigrams(query):
+            for player_id in self.trigrams.get(trigram, ()):
+                counts[player_id] = counts.get(player_id, 0) + 1
+        candidates = sorted(counts, key=counts.get, reverse=True)[:limit * 20]
+
+        matches = []
+        for player_id in candidates:
+            name = self.players[player_id][1].lower()
+            distance = _prefix_distance(query, name, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, len(name), player_id))
+        matches.sort()
+        return [player_id for _, _, player_id in matches[:limit]]
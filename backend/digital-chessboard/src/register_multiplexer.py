@@ -0,0 +1,184 @@
+""" Read Reed-Switch matrix through the memory-mapped GPIO registers (/dev/gpiomem) """
+import mmap
+import os
+import time
+
+from board_geometry import Square, get_geometry
+from debug_logger import DebugLogger
+
+# Physical header pin (GPIO.BOARD) -> BCM GPIO number of the 40-pin header
+BOARD_TO_BCM = {
+    3: 2, 5: 3, 7: 4, 8: 14, 10: 15, 11: 17, 12: 18, 13: 27, 15: 22, 16: 23,
+    18: 24, 19: 10, 21: 9, 22: 25, 23: 11, 24: 8, 26: 7, 27: 0, 28: 1, 29: 5,
+    31: 6, 32: 12, 33: 13, 35: 19, 36: 16, 37: 26, 38: 20, 40: 21,
+}
+
+# Register offsets in the GPIO block (BCM2835 / BCM2837 / BCM2711)
+GPFSEL0 = 0x00      # function select, 3 bits per pin (000 = input, 001 = output)
+GPSET0 = 0x1C       # write 1 = drive pin high
+GPCLR0 = 0x28       # write 1 = drive pin low
+GPLEV0 = 0x34       # pin levels of GPIO 0-31
+GPPUD = 0x94        # pull-up/down control (up to BCM2837)
+GPPUDCLK0 = 0x98
+GPIO_PUP_PDN_CNTRL_REG0 = 0xE4  # pull-up/down, 2 bits per pin (BCM2711)
+
+BLOCK_SIZE = 4096
+
+
+def detect_soc() -> str:
+    """'bcm2711' on a Raspberry Pi 4, 'bcm2835' for the older register layout."""
+    try:
+        with open("/proc/device-tree/compatible", 'rb') as file:
+            compatible = file.read()
+    except OSError:
+        return "bcm2835"
+    if b"bcm2712" in compatible:
+        raise RuntimeError("Raspberry Pi 5 (RP1) wird vom Register-Backend nicht unterstützt")
+    return "bcm2711" if b"bcm2711" in compatible else "bcm2835"
+
+
+class RegisterMultiplexer:
+    """Same interface as multiplexing.Multiplexer, without RPi.GPIO.
+
+    The GPIO block is mapped once and accessed as 32-bit words. Per column the
+    pin is released onto the set/clear registers and switched to output, then
+    all row pins are read at once from GPLEV0 (one read per sample), so a full
+    scan is a few dozen register accesses instead of hundreds of library calls.
+    Majority voting over the samples is done bitwise on the level words.
+
+    Pins are given as physical header numbers (GPIO.BOARD) like for the
+    Multiplexer and translated to BCM numbers. 'device' can point to any file
+    of at least BLOCK_SIZE bytes, e.g. a fake register file for tests.
+    """
+
+    def __init__(self, row_pins: list[int], column_pins: list[int], device: str = "/dev/gpiomem",
+                 soc: str | None = None):
+        self.row_pins = row_pins
+        self.column_pins = column_pins
+        self.row_bcm = [self._to_bcm(pin) for pin in row_pins]
+        self.column_bcm = [self._to_bcm(pin) for pin in column_pins]
+        self.soc = soc or detect_soc()
+
+        self.geometry = get_geometry(len(column_pins), len(row_pins))
+        self.cell_squares = [
+            [self.geometry.squares[self.geometry.cell(col_index, row_index)] for row_index in range(len(row_pins))]
+            for col_index in range(len(column_pins))
+        ]
+        # Per column: (row bit mask, Square) for every row, checked against the GPLEV0 word
+        self.row_bits = [
+            [(1 << bcm, square) for bcm, square in zip(self.row_bcm, self.cell_squares[col_index])]
+            for col_index in range(len(column_pins))
+        ]
+        self.logger = DebugLogger(enable_debug=True)
+
+        self.focus_columns = None
+        self.full_scan_interval = 0.5
+        self.last_full_scan = 0.0
+        self.column_state = [[] for _ in column_pins]
+
+        # Tuning parameters (same as the RPi.GPIO backend)
+        self.settle_delay = 0.0005
+        self.majority_vote = True  # three samples per column
+        self.inter_sample_delay = 0.0002
+
+        fd = os.open(device, os.O_RDWR | os.O_SYNC)
+        try:
+            self.map = mmap.mmap(fd, BLOCK_SIZE, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        finally:
+            os.close(fd)
+        # Word access: registers[offset // 4] is one aligned 32-bit load/store
+        self.registers = memoryview(self.map).cast("I")
+
+    @staticmethod
+    def _to_bcm(pin: int) -> int:
+        bcm = BOARD_TO_BCM.get(pin)
+        if bcm is None:
+            raise ValueError(f"Pin {pin} ist kein GPIO-Pin")
+        return bcm
+
+    def set_focus(self, squares: list[Square] | None) -> None:
+        """Restrict scanning to the columns containing the given squares (None = full scans)."""
+        if squares is None:
+            self.focus_columns = None
+        else:
+            self.focus_columns = sorted({square.x_position for square in squares
+                                         if square.x_position < len(self.column_pins)})
+
+    def _set_function(self, bcm: int, output: bool) -> None:
+        registers = self.registers
+        word = GPFSEL0 // 4 + bcm // 10
+        shift = (bcm % 10) * 3
+        registers[word] = (registers[word] & ~(0b111 << shift)) | (int(output) << shift)
+
+    def _set_pull_down(self, bcm_pins: list[int]) -> None:
+        registers = self.registers
+        if self.soc == "bcm2711":
+            for bcm in bcm_pins:
+                word = GPIO_PUP_PDN_CNTRL_REG0 // 4 + bcm // 16
+                shift = (bcm % 16) * 2
+                registers[word] = (registers[word] & ~(0b11 << shift)) | (0b10 << shift)
+        else:
+            # Older SoCs: select pull-down, clock it into the pins, then reset the control registers
+            mask = 0
+            for bcm in bcm_pins:
+                mask |= 1 << bcm
+            registers[GPPUD // 4] = 0b01
+            time.sleep(0.00001)
+            registers[GPPUDCLK0 // 4] = mask
+            time.sleep(0.00001)
+            registers[GPPUD // 4] = 0
+            registers[GPPUDCLK0 // 4] = 0
+
+    def setup(self) -> None:
+        """Columns as inputs (hi-Z) with their output latch low, rows as inputs with pull-downs."""
+        for bcm in self.column_bcm:
+            self._set_function(bcm, output=False)
+            self.registers[GPCLR0 // 4] = 1 << bcm
+        for bcm in self.row_bcm:
+            self._set_function(bcm, output=False)
+        self._set_pull_down(self.row_bcm)
+
+    def detect_signal(self) -> list[Square]:
+        """Scan with hi-Z columns like Multiplexer.detect_signal, reading each column in one access."""
+        now = time.monotonic()
+        if self.focus_columns is None or now - self.last_full_scan >= self.full_scan_interval:
+            columns = range(len(self.column_pins))
+            self.last_full_scan = now
+        else:
+            columns = self.focus_columns
+
+        registers = self.registers
+        level_word = GPLEV0 // 4
+
+        for col_index in columns:
+            bcm = self.column_bcm[col_index]
+            bit = 1 << bcm
+            # Latch high first, then switch to output: the column goes high in one step
+            registers[GPSET0 // 4] = bit
+            self._set_function(bcm, output=True)
+            time.sleep(self.settle_delay)
+
+            level = registers[level_word]
+            if self.majority_vote:
+                # Bitwise majority over three level words
+                time.sleep(self.inter_sample_delay)
+                second = registers[level_word]
+                time.sleep(self.inter_sample_delay)
+                third = registers[level_word]
+                level = (level & second) | (level & third) | (second & third)
+
+            # Release the column back to hi-Z
+            self._set_function(bcm, output=False)
+            registers[GPCLR0 // 4] = bit
+            self.column_state[col_index] = [square for mask, square in self.row_bits[col_index] if level & mask]
+
+        active_squares = [square for column_active in self.column_state for square in column_active]
+        self.logger.log_debounced_result(active_squares)
+        return active_squares
+
+    def close(self) -> None:
+        """Release all columns and unmap the register block."""
+        for bcm in self.column_bcm:
+            self._set_function(bcm, output=False)
+        self.registers.release()
+        self.map.close()
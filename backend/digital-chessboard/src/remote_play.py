@@ -0,0 +1,50 @@
+""" Helpers for remote move submission over the websocket """
+import re
+import time
+
+UCI_SQUARE = re.compile(r"^[a-h][1-8]$")
+PROMOTION_PIECES = {"q", "r", "b", "n"}
+
+# Longest message a client may send (a move is far below that)
+MAX_MESSAGE_LENGTH = 256
+
+
+class TokenBucket:
+    """Per-connection rate limiter.
+
+    Every message costs one token; tokens refill with 'rate' per second up to 'burst'.
+    """
+
+    def __init__(self, rate: float = 5.0, burst: int = 10):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+def move_to_uci(from_square: str, to_square: str, promotion: str | None = None) -> str:
+    """Build a UCI string from the fields of a submitted move.
+
+    Raises:
+        ValueError: If a square or the promotion piece is malformed.
+    """
+    from_square = from_square.lower()
+    to_square = to_square.lower()
+
+    if not UCI_SQUARE.match(from_square) or not UCI_SQUARE.match(to_square):
+        raise ValueError("Ungültiges Feld")
+    if promotion is not None:
+        promotion = promotion.lower()
+        if promotion not in PROMOTION_PIECES:
+            raise ValueError("Ungültige Umwandlungsfigur")
+
+    return from_square + to_square + (promotion or "")
@@ -0,0 +1,202 @@
+""" Sensor scanning in a separate process, publishing occupancy frames through shared memory """
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+
+from board_geometry import Square, get_geometry
+from debug_logger import DebugLogger
+
+# Header: sequence number of the newest frame (0 = nothing published yet)
+HEADER_FORMAT = struct.Struct("<Q")
+# Slot: sequence number, timestamp, occupancy bitmask (bit = y * 8 + x)
+SLOT_FORMAT = struct.Struct("<QdQ")
+SEQUENCE_FORMAT = struct.Struct("<Q")
+FRAME_FORMAT = struct.Struct("<dQ")
+
+# Name of the child process; set before spawn re-imports the parent's __main__ module
+SCAN_PROCESS_NAME = "sensor-scan"
+
+# Square for every bit of the occupancy mask
+_BIT_SQUARES = [Square(bit % 8, bit // 8) for bit in range(64)]
+
+
+def squares_to_mask(squares) -> int:
+    mask = 0
+    for square in squares:
+        mask |= 1 << (square.y_position * 8 + square.x_position)
+    return mask
+
+
+def mask_to_squares(mask: int) -> list[Square]:
+    squares = []
+    while mask:
+        low_bit = mask & -mask
+        squares.append(_BIT_SQUARES[low_bit.bit_length() - 1])
+        mask ^= low_bit
+    return squares
+
+
+class OccupancyRing:
+    """Single-writer ring buffer of occupancy frames in shared memory.
+
+    The writer marks the slot as invalid (sequence 0), fills it, writes the
+    slot sequence number last and then advances the header. A reader checks
+    the slot sequence before and after reading the frame (seqlock), so a slot
+    that is being overwritten is reported as lost instead of mixing the new
+    sequence number with the old mask.
+    """
+
+    def __init__(self, name: str | None = None, slots: int = 64):
+        self.slots = slots
+        size = HEADER_FORMAT.size + SLOT_FORMAT.size * slots
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+            self.memory.buf[:size] = bytes(size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.name = self.memory.name
+
+    def _slot_offset(self, sequence: int) -> int:
+        return HEADER_FORMAT.size + (sequence % self.slots) * SLOT_FORMAT.size
+
+    def publish(self, sequence: int, mask: int) -> None:
+        buf = self.memory.buf
+        offset = self._slot_offset(sequence)
+        SEQUENCE_FORMAT.pack_into(buf, offset, 0)
+        FRAME_FORMAT.pack_into(buf, offset + SEQUENCE_FORMAT.size, time.time(), mask)
+        SEQUENCE_FORMAT.pack_into(buf, offset, sequence)
+        HEADER_FORMAT.pack_into(buf, 0, sequence)
+
+    def latest_sequence(self) -> int:
+        return HEADER_FORMAT.unpack_from(self.memory.buf, 0)[0]
+
+    def read(self, sequence: int) -> tuple[float, int] | None:
+        """Return (timestamp, mask) of a frame, None if it was already overwritten."""
+        buf = self.memory.buf
+        offset = self._slot_offset(sequence)
+        slot_sequence, timestamp, mask = SLOT_FORMAT.unpack_from(buf, offset)
+        # Re-check after reading: the writer may have started on this slot in between
+        if slot_sequence != sequence or SEQUENCE_FORMAT.unpack_from(buf, offset)[0] != sequence:
+            return None
+        return timestamp, mask
+
+    def close(self, unlink: bool = False) -> None:
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+def _scan_worker(ring_name: str, slots: int, row_pins: list[int], column_pins: list[int],
+                 scan_interval: float, stop_event) -> None:
+    """Entry point of the scan process: scan continuously and publish every change."""
+    # GPIO is only touched inside this process
+    from multiplexing import Multiplexer
+    import RPi.GPIO as GPIO
+
+    ring = OccupancyRing(ring_name, slots)
+    mux = Multiplexer(row_pins=row_pins, column_pins=column_pins)
+    mux.setup()
+
+    sequence = 0
+    last_mask = None
+    try:
+        while not stop_event.is_set():
+            mask = squares_to_mask(mux.detect_signal())
+            if mask != last_mask:
+                sequence += 1
+                ring.publish(sequence, mask)
+                last_mask = mask
+            time.sleep(scan_interval)
+    finally:
+        ring.close()
+        GPIO.cleanup()
+
+
+class ScanProcess:
+    """Drop-in replacement for Multiplexer that scans in its own process.
+
+    The child process owns the GPIO pins and runs the majority-vote scan
+    independently of uvicorn's GIL. detect_signal() in the main process only
+    reads the newest frame from shared memory and never blocks.
+    """
+
+    def __init__(self, row_pins: list[int], column_pins: list[int], scan_interval: float = 0.02,
+                 slots: int = 64):
+        self.row_pins = row_pins
+        self.column_pins = column_pins
+        self.scan_interval = scan_interval
+        self.geometry = get_geometry(len(column_pins), len(row_pins))
+        self.logger = DebugLogger(enable_debug=True)
+
+        self.ring = OccupancyRing(slots=slots)
+        self.last_sequence = 0
+        self.current_squares = []
+
+        self.context = multiprocessing.get_context("spawn")
+        self.stop_event = self.context.Event()
+        self.process = None
+
+    def setup(self) -> None:
+        """Start the scan process (GPIO setup happens inside the child).
+
+        The child is started with 'spawn', which re-imports the __main__ module
+        if it was started as a script. main.py therefore hands over to the
+        uvicorn module entry point before any hardware is touched; starting
+        another scan process from that re-import is refused. Other child
+        processes (e.g. uvicorn --reload) may start it.
+        """
+        if multiprocessing.current_process().name == SCAN_PROCESS_NAME:
+            raise RuntimeError("ScanProcess darf nicht im Scan-Prozess selbst gestartet werden "
+                               "(Server über 'python3 -m uvicorn main:app' oder 'python3 main.py' starten)")
+        if self.process and self.process.is_alive():
+            return
+        self.process = self.context.Process(
+            target=_scan_worker,
+            args=(self.ring.name, self.ring.slots, self.row_pins, self.column_pins,
+                  self.scan_interval, self.stop_event),
+            name=SCAN_PROCESS_NAME,
+            daemon=True,
+        )
+        self.process.start()
+
+    def poll_changes(self) -> list[tuple[int, float, list[Square]]]:
+        """Return all frames published since the last call as (sequence, timestamp, squares).
+
+        If the reader fell behind by more than the ring size, older frames are
+        skipped and only the still available ones are returned.
+        """
+        latest = self.ring.latest_sequence()
+        if latest == self.last_sequence:
+            return []
+
+        changes = []
+        first = max(self.last_sequence + 1, latest - self.ring.slots + 1)
+        for sequence in range(first, latest + 1):
+            frame = self.ring.read(sequence)
+            if frame is not None:
+                timestamp, mask = frame
+                squares = mask_to_squares(mask)
+                changes.append((sequence, timestamp, squares))
+                self.logger.log_debounced_result(squares)
+        self.last_sequence = latest
+        if changes:
+            self.current_squares = changes[-1][2]
+        return changes
+
+    def set_focus(self, squares: list[Square] | None) -> None:
+        """No-op: the scan process scans the full board continuously."""
+
+    def detect_signal(self) -> list[Square]:
+        """Newest debounced occupancy frame (same interface as Multiplexer).
+
+        Frames in between are merged; GameManager uses poll_changes() instead.
+        """
+        self.poll_changes()
+        return self.current_squares
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.process:
+            self.process.join(timeout=1.0)
+        self.ring.close(unlink=True)
@@ -0,0 +1,110 @@
+""" Hardware-free board for load tests: fake sensors/LEDs and a synthetic move stream """
+import random
+import threading
+import time
+
+from board_geometry import Square, get_geometry
+from debug_logger import DebugLogger
+from led_effects import EffectLibrary, LedEffect
+
+
+class SimulatedMultiplexer:
+    """Stands in for Multiplexer; detect_signal() returns whatever 'occupancy' holds."""
+
+    def __init__(self, row_pins: list[int], column_pins: list[int]):
+        self.row_pins = row_pins
+        self.column_pins = column_pins
+        self.geometry = get_geometry(len(column_pins), len(row_pins))
+        self.logger = DebugLogger(enable_debug=False)
+        self.occupancy = set()
+
+    def setup(self) -> None:
+        pass
+
+    def set_focus(self, squares: list[Square] | None) -> None:
+        pass
+
+    def detect_signal(self) -> list[Square]:
+        squares = list(self.occupancy)
+        self.logger.log_debounced_result(squares)
+        return squares
+
+
+class SimulatedLED:
+    """Stands in for LED; keeps the colors in memory instead of driving a strip."""
+
+    def __init__(self, WIDTH, HEIGHT, brightness=1.0):
+        self.WIDTH = WIDTH
+        self.HEIGHT = HEIGHT
+        self.LED_COUNT = WIDTH * HEIGHT
+        self.geometry = get_geometry(WIDTH, HEIGHT)
+        self.effects = EffectLibrary(self.geometry, brightness=brightness)
+        self.pixels = [(0, 0, 0)] * self.LED_COUNT
+
+    def play_effect(self, effect: LedEffect, blocking=False):
+        pass
+
+    def stop_effect(self):
+        pass
+
+    def set_color(self, x_position, y_position, color) -> bool:
+        if not (0 <= x_position < self.WIDTH and 0 <= y_position < self.HEIGHT):
+            return False
+        self.pixels[self.geometry.led_of(x_position, y_position)] = color
+        return True
+
+    def set_all_color(self, color):
+        self.pixels = [color] * self.LED_COUNT
+
+    def rgb_rainbow_breathing_effect(self, wait_ms):
+        pass
+
+    def clear(self):
+        self.pixels = [(0, 0, 0)] * self.LED_COUNT
+
+    def init_chess_matrix(self):
+        pass
+
+
+class SyntheticMoveDriver:
+    """Plays random legal moves through GameManager.apply_remote_move at a fixed rate.
+
+    After every accepted move the simulated sensors are updated to the new
+    position, so the poll loop sees the pieces "replicated" like on the real
+    board. A finished game is restarted automatically.
+    """
+
+    def __init__(self, game_manager, multiplexer: SimulatedMultiplexer, interval: float = 0.5, seed: int | None = None):
+        self.game_manager = game_manager
+        self.multiplexer = multiplexer
+        self.interval = interval
+        self.random = random.Random(seed)
+        self.running = False
+        self.moves_played = 0
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self._run, name="synthetic-moves", daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.interval)
+            game_manager = self.game_manager
+            if not game_manager.running:
+                game_manager.start()
+                # New game: sensors jump to the starting position without being read as moves
+                self.multiplexer.occupancy = game_manager.occupied_squares()
+                game_manager.previous_state = set(self.multiplexer.occupancy)
+                continue
+
+            legal_moves = sorted(game_manager.get_legal_uci_moves())
+            if not legal_moves:
+                continue
+            # Plays both colors, so there is no remote seat to check
+            accepted, _ = game_manager.apply_remote_move(self.random.choice(legal_moves), check_seat=False)
+            if accepted:
+                self.moves_played += 1
+                self.multiplexer.occupancy = game_manager.occupied_squares()
@@ -0,0 +1,119 @@
+""" Serve the built frontend (dist) with precompressed variants and cache headers """
+import hashlib
+import mimetypes
+import os
+import re
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+# Vite appends a content hash to bundled files in assets/: assets/index-D87nrUUh.js,
+# assets/white-king-C7cXiWq-.svg (files from public/ keep their name and are not immutable)
+HASHED_ASSET = re.compile(r"^assets/(?:.*/)?[^/]+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+
+# Preferred order if the client accepts several encodings
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Content codings the client accepts ('gzip;q=0' or 'x-gzip-foo' do not count as gzip)."""
+    accepted = set()
+    wildcard = False
+    refused = set()
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding == "*":
+            wildcard = quality > 0
+        elif quality > 0:
+            accepted.add(coding)
+        else:
+            refused.add(coding)
+    if wildcard:
+        accepted.update(encoding for encoding, _ in ENCODINGS if encoding not in refused)
+    return accepted
+
+
+class FrontendAssets:
+    """Index of all files in the frontend dist folder, built once at startup.
+
+    For every file the precompressed variants (.br / .gz, generated at build time
+    by Scripts/precompress_assets.py) and an ETag are looked up in advance, so a
+    request only costs a dict lookup. Only indexed files are served, which also
+    rules out path traversal.
+    """
+
+    def __init__(self, dist_dir: str):
+        self.dist_dir = os.path.abspath(dist_dir)
+        self.files = {}
+        if os.path.isdir(self.dist_dir):
+            self._build_index()
+
+    def _build_index(self):
+        for root, _, files in os.walk(self.dist_dir):
+            for file in files:
+                if file.endswith((".br", ".gz")):
+                    continue
+                path = os.path.join(root, file)
+                rel_path = os.path.relpath(path, self.dist_dir).replace("\\", "/")
+                with open(path, "rb") as handle:
+                    etag = '"' + hashlib.sha1(handle.read()).hexdigest()[:16] + '"'
+                variants = {
+                    encoding: path + suffix
+                    for encoding, suffix in ENCODINGS
+                    if os.path.exists(path + suffix)
+                }
+                self.files[rel_path] = {
+                    "path": path,
+                    "variants": variants,
+                    "media_type": mimetypes.guess_type(file)[0] or "application/octet-stream",
+                    "etag": etag,
+                    "immutable": bool(HASHED_ASSET.match(rel_path)),
+                }
+
+    @property
+    def available(self) -> bool:
+        return "index.html" in self.files
+
+    def response(self, request: Request, rel_path: str) -> Response:
+        """Response for a dist file; unknown route paths fall back to index.html (SPA routing).
+
+        Missing files (anything under assets/ or with a file extension) get a 404,
+        otherwise a stale bundle name would be answered with HTML and cached.
+        """
+        entry = self.files.get(rel_path)
+        if entry is None:
+            if rel_path.startswith("assets/") or "." in rel_path.rsplit("/", 1)[-1]:
+                return Response(status_code=404)
+            entry = self.files.get("index.html")
+        if entry is None:
+            return Response(status_code=404)
+
+        headers = {"Vary": "Accept-Encoding"}
+        if entry["immutable"]:
+            # File name changes with its content -> clients never need to revalidate
+            headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            headers["Cache-Control"] = "no-cache"
+            headers["ETag"] = entry["etag"]
+            if request.headers.get("if-none-match") == entry["etag"]:
+                return Response(status_code=304, headers=headers)
+
+        accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+        for encoding, _ in ENCODINGS:
+            variant = entry["variants"].get(encoding)
+            if variant and encoding in accepted:
+                headers["Content-Encoding"] = encoding
+                return FileResponse(variant, media_type=entry["media_type"], headers=headers)
+
+        return FileResponse(entry["path"], media_type=entry["media_type"], headers=headers)
@@ -0,0 +1,400 @@
+""" Swiss tournaments: pairings, results and standings with incrementally updated tie-breaks """
+import collections
+import json
+import os
+
+tournament_dir = r"./Tournaments"
+
+RESULT_POINTS = {"1-0": (1.0, 0.0), "0-1": (0.0, 1.0), "1/2-1/2": (0.5, 0.5)}
+BYE_POINTS = 1.0
+
+
+class TournamentPlayer:
+    """Running totals of one participant, updated with every recorded result.
+
+    Attributes:
+        games (list[tuple[int, float]]): (opponent id, own points) per finished game.
+        colors (list[str]): 'W' / 'B' per paired game, '-' for a bye.
+        buchholz (float): Sum of the current scores of all opponents.
+        sonneborn_berger (float): Sum of (own points * opponent score) over all games.
+    """
+
+    def __init__(self, id: int, gamertag: str, rating: int):
+        self.id = id
+        self.gamertag = gamertag
+        self.rating = rating
+        self.score = 0.0
+        self.buchholz = 0.0
+        self.sonneborn_berger = 0.0
+        self.games = []
+        self.colors = []
+        self.opponents = set()
+        self.had_bye = False
+
+    @property
+    def color_difference(self) -> int:
+        return self.colors.count("W") - self.colors.count("B")
+
+    def color_preference(self) -> tuple[str | None, bool]:
+        """Preferred color and whether the preference is absolute (must be granted)."""
+        played = [color for color in self.colors if color != "-"]
+        difference = self.color_difference
+        if difference <= -2 or played[-2:] == ["B", "B"]:
+            return "W", True
+        if difference >= 2 or played[-2:] == ["W", "W"]:
+            return "B", True
+        if difference < 0:
+            return "W", False
+        if difference > 0:
+            return "B", False
+        if played:
+            return ("B" if played[-1] == "W" else "W"), False
+        return None, False
+
+
+class Tournament:
+    """Swiss system tournament over the registered players.
+
+    Pairing follows the Dutch idea: players are sorted by score and rating,
+    every score group is split into an upper and lower half and the upper half
+    is paired against the lower half. Players who cannot be paired in their
+    group float down to the next one. If this greedy pass leaves players
+    unpaired, the pairing is repaired with a maximum matching in which
+    rematches are forbidden, so a rematch only happens when no rematch-free
+    pairing of the round exists.
+    """
+
+    def __init__(self, id: int, name: str, players: list[TournamentPlayer], rounds: int):
+        self.id = id
+        self.name = name
+        self.planned_rounds = rounds
+        self.players = {player.id: player for player in players}
+        # rounds[i] = list of pairings {"white": id, "black": id | None, "result": str | None}
+        self.rounds = []
+        self._preferences = {}
+
+    # ------------------------- Pairing ------------------------- #
+
+    def ranking(self) -> list[TournamentPlayer]:
+        return sorted(self.players.values(),
+                      key=lambda p: (-p.score, -p.buchholz, -p.sonneborn_berger, -p.rating, p.id))
+
+    def current_round_finished(self) -> bool:
+        return not self.rounds or all(pairing["result"] is not None for pairing in self.rounds[-1])
+
+    def pair_next_round(self) -> list[dict]:
+        if not self.current_round_finished():
+            raise ValueError("Die aktuelle Runde ist noch nicht abgeschlossen")
+        if len(self.rounds) >= self.planned_rounds:
+            raise ValueError("Alle Runden wurden bereits gespielt")
+
+        ranking = sorted(self.players.values(), key=lambda p: (-p.score, -p.rating, p.id))
+        # Preferences only change between rounds, so they are evaluated once per player
+        self._preferences = {player.id: player.color_preference() for player in ranking}
+
+        # Odd number of players: the lowest ranked player without a bye sits out
+        bye_player = None
+        if len(ranking) % 2 == 1:
+            bye_player = next((p for p in reversed(ranking) if not p.had_bye), ranking[-1])
+            ranking.remove(bye_player)
+
+        pairings = []
+        for first, second in self._pair_groups(ranking):
+            white, black = self._allocate_colors(first, second)
+            pairings.append({"white": white.id, "black": black.id, "result": None})
+            white.colors.append("W")
+            black.colors.append("B")
+        if bye_player is not None:
+            pairings.append({"white": bye_player.id, "black": None, "result": "bye"})
+            self._record_bye(bye_player)
+
+        self.rounds.append(pairings)
+        return pairings
+
+    def _pair_groups(self, ranking: list[TournamentPlayer]) -> list[tuple[TournamentPlayer, TournamentPlayer]]:
+        groups = []
+        for player in ranking:
+            if groups and groups[-1][0].score == player.score:
+                groups[-1].append(player)
+            else:
+                groups.append([player])
+
+        pairs = []
+        floaters = []
+        for index, group in enumerate(groups):
+            group = floaters + group
+            last_group = index == len(groups) - 1
+            group_pairs, floaters = self._pair_group(group, strict_colors=not last_group)
+            pairs.extend(group_pairs)
+
+        if floaters:
+            # Greedy pass got stuck: repair the pairing with augmenting paths over the whole field
+            pairs, floaters = self._complete_matching(ranking, pairs)
+
+        # Only if no rematch-free pairing exists at all: a rematch is the last resort
+        while len(floaters) >= 2:
+            pairs.append((floaters.pop(0), floaters.pop(0)))
+        return pairs
+
+    def _complete_matching(self, ranking: list[TournamentPlayer], pairs: list):
+        """Extend the greedy pairs to a maximum matching in which rematches are forbidden edges.
+
+        Edmonds' blossom algorithm, started from the greedy matching, so only the
+        few unpaired players are searched for augmenting paths and most pairs of
+        the Dutch pass stay as they are. Returns (pairs, players still unpaired);
+        the latter is only non-empty if no rematch-free pairing exists.
+        """
+        n = len(ranking)
+        position = {player.id: index for index, player in enumerate(ranking)}
+        forbidden = [{position[opponent] for opponent in player.opponents if opponent in position}
+                     for player in ranking]
+        match = [-1] * n
+        for first, second in pairs:
+            match[position[first.id]] = position[second.id]
+            match[position[second.id]] = position[first.id]
+
+        for root in range(n):
+            if match[root] == -1:
+                end, parent = _find_augmenting_path(root, n, forbidden, match)
+                # Flip the matched / unmatched edges along the path
+                while end != -1:
+                    previous = parent[end]
+                    next_end = match[previous]
+                    match[end] = previous
+                    match[previous] = end
+                    end = next_end
+
+        pairs = [(ranking[index], ranking[match[index]]) for index in range(n) if index < match[index]]
+        return pairs, [ranking[index] for index in range(n) if match[index] == -1]
+
+    def _pair_group(self, group: list[TournamentPlayer], strict_colors: bool):
+        """Pair upper half against lower half; returns (pairs, unpaired players)."""
+        remaining = list(group)
+        pairs = []
+        unpaired = []
+        half = len(group) // 2
+        while remaining:
+            player = remaining.pop(0)
+            # Dutch order: start looking 'half' positions below, then wrap around
+            start = max(0, min(half - 1, len(remaining) - 1))
+            candidates = remaining[start:] + remaining[:start]
+            opponent = next((c for c in candidates if self._compatible(player, c, strict_colors)), None)
+            if opponent is None:
+                unpaired.append(player)
+                continue
+            remaining.remove(opponent)
+            pairs.append((player, opponent))
+            half = max(1, half - 1)
+        return pairs, unpaired
+
+    def _compatible(self, first: TournamentPlayer, second: TournamentPlayer, strict_colors: bool) -> bool:
+        if second.id in first.opponents:
+            return False
+        if strict_colors:
+            first_color, first_absolute = self._preferences[first.id]
+            second_color, second_absolute = self._preferences[second.id]
+            if first_absolute and second_absolute and first_color == second_color:
+                return False
+        return True
+
+    def _allocate_colors(self, first: TournamentPlayer, second: TournamentPlayer):
+        """Return (white, black); 'first' is the higher ranked player and wins ties."""
+        first_color, first_absolute = self._preferences[first.id]
+        second_color, second_absolute = self._preferences[second.id]
+        if first_color is None and second_color is None:
+            return first, second
+        if first_color is None or (first_color == second_color and second_absolute and not first_absolute):
+            chooser, other, color = second, first, second_color
+        else:
+            chooser, other, color = first, second, first_color
+        return (chooser, other) if color == "W" else (other, chooser)
+
+    # ------------------------- Results ------------------------- #
+
+    def record_result(self, white_id: int, black_id: int, result: str) -> bool:
+        """Store the result of a pairing in the current round. False if there is no such pairing."""
+        if result not in RESULT_POINTS or not self.rounds:
+            return False
+        pairing = next((p for p in self.rounds[-1]
+                        if p["white"] == white_id and p["black"] == black_id and p["result"] is None), None)
+        if pairing is None:
+            return False
+
+        pairing["result"] = result
+        white, black = self.players[white_id], self.players[black_id]
+        white_points, black_points = RESULT_POINTS[result]
+
+        # New opponents: both count each other's current score for the tie-breaks ...
+        white.games.append((black.id, white_points))
+        black.games.append((white.id, black_points))
+        white.opponents.add(black.id)
+        black.opponents.add(white.id)
+        white.buchholz += black.score
+        black.buchholz += white.score
+        white.sonneborn_berger += white_points * black.score
+        black.sonneborn_berger += black_points * white.score
+
+        # ... then the new points are propagated to all opponents (including each other)
+        self._add_points(white, white_points)
+        self._add_points(black, black_points)
+        return True
+
+    def _record_bye(self, player: TournamentPlayer):
+        player.had_bye = True
+        player.colors.append("-")
+        self._add_points(player, BYE_POINTS)
+
+    def _add_points(self, player: TournamentPlayer, points: float):
+        if not points:
+            return
+        player.score += points
+        for opponent_id, own_points in player.games:
+            opponent = self.players[opponent_id]
+            opponent.buchholz += points
+            opponent.sonneborn_berger += (1.0 - own_points) * points
+
+    def standings(self) -> list[dict]:
+        return [
+            {
+                "rank": rank,
+                "id": player.id,
+                "gamertag": player.gamertag,
+                "rating": player.rating,
+                "score": player.score,
+                "buchholz": player.buchholz,
+                "sonneborn_berger": player.sonneborn_berger,
+            }
+            for rank, player in enumerate(self.ranking(), start=1)
+        ]
+
+    # ------------------------- Storage ------------------------- #
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "planned_rounds": self.planned_rounds,
+            "players": [{"id": p.id, "gamertag": p.gamertag, "rating": p.rating} for p in self.players.values()],
+            "rounds": self.rounds,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Tournament":
+        """Rebuild the running totals by replaying the stored rounds."""
+        players = [TournamentPlayer(p["id"], p["gamertag"], p["rating"]) for p in data["players"]]
+        tournament = cls(data["id"], data["name"], players, data["planned_rounds"])
+        for pairings in data["rounds"]:
+            tournament.rounds.append([dict(pairing, result="bye" if pairing["black"] is None else None)
+                                      for pairing in pairings])
+            for pairing in pairings:
+                if pairing["black"] is None:
+                    tournament._record_bye(tournament.players[pairing["white"]])
+                else:
+                    tournament.players[pairing["white"]].colors.append("W")
+                    tournament.players[pairing["black"]].colors.append("B")
+            for pairing in pairings:
+                if pairing["black"] is not None and pairing["result"] is not None:
+                    tournament.record_result(pairing["white"], pairing["black"], pairing["result"])
+        return tournament
+
+
+def _find_augmenting_path(root: int, n: int, forbidden: list[set[int]], match: list[int]):
+    """BFS for an augmenting path from 'root' with blossom contraction.
+
+    Every pair of players is an edge unless it is in 'forbidden'. Returns the
+    free end of the path (-1 if there is none) and the parent links to walk back.
+    """
+    used = [False] * n
+    parent = [-1] * n
+    base = list(range(n))
+    used[root] = True
+    queue = collections.deque([root])
+
+    def lowest_common_ancestor(a: int, b: int) -> int:
+        on_path = [False] * n
+        while True:
+            a = base[a]
+            on_path[a] = True
+            if match[a] == -1:
+                break
+            a = parent[match[a]]
+        while True:
+            b = base[b]
+            if on_path[b]:
+                return b
+            b = parent[match[b]]
+
+    def mark_path(v: int, blossom_base: int, child: int, blossom: list[bool]):
+        while base[v] != blossom_base:
+            blossom[base[v]] = blossom[base[match[v]]] = True
+            parent[v] = child
+            child = match[v]
+            v = parent[match[v]]
+
+    while queue:
+        v = queue.popleft()
+        excluded = forbidden[v]
+        for to in range(n):
+            if to == v or to in excluded or base[v] == base[to] or match[v] == to:
+                continue
+            if to == root or (match[to] != -1 and parent[match[to]] != -1):
+                # Odd cycle: contract the blossom into its base
+                blossom_base = lowest_common_ancestor(v, to)
+                blossom = [False] * n
+                mark_path(v, blossom_base, to, blossom)
+                mark_path(to, blossom_base, v, blossom)
+                for index in range(n):
+                    if blossom[base[index]]:
+                        base[index] = blossom_base
+                        if not used[index]:
+                            used[index] = True
+                            queue.append(index)
+            elif parent[to] == -1:
+                parent[to] = v
+                if match[to] == -1:
+                    return to, parent
+                used[match[to]] = True
+                queue.append(match[to])
+    return -1, parent
+
+
+class TournamentStore:
+    """Keeps all tournaments in memory and writes each one to its own JSON file."""
+
+    def __init__(self, directory: str = tournament_dir):
+        self.directory = directory
+        self.tournaments = {}
+        if os.path.isdir(directory):
+            for file in os.listdir(directory):
+                if file.endswith(".json"):
+                    with open(os.path.join(directory, file)) as handle:
+                        tournament = Tournament.from_dict(json.load(handle))
+                    self.tournaments[tournament.id] = tournament
+
+    def create(self, name: str, players: list[TournamentPlayer], rounds: int) -> Tournament:
+        if len(players) < 2:
+            raise ValueError("Mindestens zwei Spieler benötigt")
+        tournament = Tournament(max(self.tournaments, default=0) + 1, name, players, rounds)
+        self.tournaments[tournament.id] = tournament
+        self.save(tournament)
+        return tournament
+
+    def get(self, tournament_id: int) -> Tournament | None:
+        return self.tournaments.get(tournament_id)
+
+    def save(self, tournament: Tournament) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{tournament.id}.json")
+        with open(path + ".tmp", 'w') as file:
+            json.dump(tournament.to_dict(), file)
+        os.replace(path + ".tmp", path)
+
+    def record_game(self, white_id: int | None, black_id: int | None, result: str) -> Tournament | None:
+        """Record a finished board game in the tournament that has this pairing open."""
+        if white_id is None or black_id is None:
+            return None
+        for tournament in self.tournaments.values():
+            if tournament.record_result(white_id, black_id, result):
+                self.save(tournament)
+                return tournament
+        return None
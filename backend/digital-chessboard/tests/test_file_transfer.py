@@ -0,0 +1,89 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+paramiko = pytest.importorskip("paramiko")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Scripts"))
+
+from file_transfer import LocalTree, SftpTree, sftp_copy_dir, sync
+
+
+class LocalSftp:
+    """Stand-in for paramiko.SFTPClient that works on a local directory (remote paths are used as-is)."""
+
+    def stat(self, path):
+        return paramiko.SFTPAttributes.from_stat(os.stat(path))
+
+    def mkdir(self, path):
+        os.mkdir(path)
+
+    def listdir_attr(self, path):
+        return [paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(path, name)), name)
+                for name in sorted(os.listdir(path))]
+
+    def open(self, path, mode="r"):
+        return open(path, mode)
+
+    def put(self, local_path, remote_path):
+        shutil.copyfile(local_path, remote_path)
+        return self.stat(remote_path)
+
+    def get(self, remote_path, local_path):
+        shutil.copyfile(remote_path, local_path)
+
+    def remove(self, path):
+        os.remove(path)
+
+    def close(self):
+        pass
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+
+def read(path):
+    with open(path) as file:
+        return file.read()
+
+
+@pytest.fixture
+def trees(tmp_path):
+    local, remote = tmp_path / "local", tmp_path / "pi"
+    write(str(local / "src" / "main.py"), "new")
+    write(str(local / "Player" / "player.csv"), "1,local,1200")
+    write(str(local / "Games" / "journal" / "journal.jsonl"), "local")
+    write(str(remote / "src" / "main.py"), "old")
+    write(str(remote / "src" / "removed.py"), "old")
+    write(str(remote / "Player" / "player.csv"), "1,pi,1450")
+    write(str(remote / "Games" / "journal" / "journal.jsonl"), "pi")
+    write(str(remote / "Tournaments" / "1.json"), "{}")
+    return str(local), str(remote)
+
+
+def test_sync_upload_with_delete_keeps_runtime_data(trees):
+    local, remote = trees
+    transferred = sync(LocalTree(local), SftpTree(LocalSftp, remote), upload=True, workers=2, delete=True)
+
+    assert transferred == ["src/main.py"]
+    assert read(os.path.join(remote, "src", "main.py")) == "new"
+    assert not os.path.exists(os.path.join(remote, "src", "removed.py"))
+    assert read(os.path.join(remote, "Player", "player.csv")) == "1,pi,1450"
+    assert read(os.path.join(remote, "Games", "journal", "journal.jsonl")) == "pi"
+    assert os.path.exists(os.path.join(remote, "Tournaments", "1.json"))
+
+
+def test_full_upload_keeps_runtime_data(trees):
+    local, remote = trees
+    write(os.path.join(local, "src", "__pycache__", "main.cpython-311.pyc"), "")
+    sftp_copy_dir(LocalSftp(), local, remote, upload=True)
+
+    assert read(os.path.join(remote, "src", "main.py")) == "new"
+    assert read(os.path.join(remote, "Player", "player.csv")) == "1,pi,1450"
+    assert read(os.path.join(remote, "Games", "journal", "journal.jsonl")) == "pi"
+    assert not os.path.exists(os.path.join(remote, "src", "__pycache__"))
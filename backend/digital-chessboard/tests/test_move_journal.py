@@ -0,0 +1,101 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from move_journal import SNAPSHOT_INTERVAL, MoveJournal
+
+START_FEN = "1k3r2/2p1n3/6Q1/b2q4/7B/2N5/1P6/4R1K1 w - - 0 1"
+
+
+def write_journal(directory, records, tail=""):
+    with open(os.path.join(directory, "journal.jsonl"), "w") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+        file.write(tail)
+
+
+def write_snapshot(directory, seq, game):
+    with open(os.path.join(directory, "snapshot.json"), "w") as file:
+        json.dump({"seq": seq, "game": game}, file)
+
+
+def start_record(seq, clock=100.0):
+    return {"type": "start", "starting_fen": START_FEN, "white_id": 1, "black_id": 2, "clock": clock, "seq": seq}
+
+
+def move_record(seq, uci, clock):
+    return {"type": "move", "move": uci, "clock": clock, "seq": seq}
+
+
+def open_journal(directory):
+    journal = MoveJournal(str(directory), interval=60.0)
+    journal.running = False
+    return journal
+
+
+def test_torn_last_line_is_cut_and_appending_continues(tmp_path):
+    write_journal(tmp_path, [start_record(1), move_record(2, "g6g7", 101.0)],
+                  tail='{"type": "move", "move": "b8a8", "cl')
+    journal = open_journal(tmp_path)
+
+    game = journal.recover()
+    assert game["moves"] == ["g6g7"]
+    assert game["clocks"] == [100.0, 101.0]
+    assert journal.seq == 2
+    with open(tmp_path / "journal.jsonl", "rb") as file:
+        assert file.read().endswith(b"\n")
+
+    # The next record starts on its own line instead of being glued to the torn one
+    journal.record_move("b8a8", 102.0)
+    journal.close()
+    assert open_journal(tmp_path).recover()["moves"] == ["g6g7", "b8a8"]
+
+
+def test_snapshot_plus_tail_skips_records_already_in_the_snapshot(tmp_path):
+    snapshot_game = {"starting_fen": START_FEN, "white_id": 1, "black_id": 2,
+                     "moves": ["g6g7", "b8a8"], "clocks": [100.0, 101.0, 102.0]}
+    write_snapshot(tmp_path, 3, snapshot_game)
+    # Journal still contains records up to seq 3 (crash between snapshot and truncation)
+    write_journal(tmp_path, [move_record(2, "g6g7", 101.0), move_record(3, "b8a8", 102.0),
+                             move_record(4, "g7f8", 103.0)])
+
+    game = open_journal(tmp_path).recover()
+    assert game["moves"] == ["g6g7", "b8a8", "g7f8"]
+    assert game["clocks"] == [100.0, 101.0, 102.0, 103.0]
+
+
+def test_takeback_replay_trims_clocks(tmp_path):
+    write_journal(tmp_path, [
+        start_record(1),
+        move_record(2, "g6g7", 101.0),
+        move_record(3, "b8a8", 102.0),
+        move_record(4, "g7f8", 103.0),
+        {"type": "takeback", "plies": 2, "seq": 5},
+        move_record(6, "g7g8", 104.0),
+    ])
+
+    game = open_journal(tmp_path).recover()
+    assert game["moves"] == ["g6g7", "g7g8"]
+    assert game["clocks"] == [100.0, 101.0, 104.0]
+
+
+def test_ended_game_is_not_recovered(tmp_path):
+    write_journal(tmp_path, [start_record(1), move_record(2, "g6g7", 101.0), {"type": "end", "seq": 3}])
+    assert open_journal(tmp_path).recover() is None
+
+
+def test_recorded_game_survives_snapshots(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.record_start(START_FEN, 1, 2, 100.0)
+    moves = ["g6g7", "b8a8"] * SNAPSHOT_INTERVAL
+    for ply, uci in enumerate(moves, start=1):
+        journal.record_move(uci, 100.0 + ply)
+    journal.record_takeback(1)
+    journal.close()
+
+    game = open_journal(tmp_path).recover()
+    assert game == journal.game
+    assert game["moves"] == moves[:-1]
+    assert len(game["clocks"]) == len(moves)
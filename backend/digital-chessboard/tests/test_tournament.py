@@ -0,0 +1,53 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tournament import RESULT_POINTS, Tournament, TournamentPlayer
+
+
+def has_rematch_free_pairing(ids: list[int], opponents: dict[int, set[int]]) -> bool:
+    if not ids:
+        return True
+    first, rest = ids[0], ids[1:]
+    for index, other in enumerate(rest):
+        if other not in opponents[first] and has_rematch_free_pairing(rest[:index] + rest[index + 1:], opponents):
+            return True
+    return False
+
+
+def test_no_rematch_when_a_rematch_free_pairing_exists():
+    rng = random.Random(7)
+    for event in range(200):
+        count = rng.choice([6, 8, 10])
+        players = [TournamentPlayer(i, f"p{i}", rng.randint(1000, 2000)) for i in range(count)]
+        tournament = Tournament(event, "Test", players, rounds=count - 1)
+
+        for _ in range(count - 1):
+            opponents = {player.id: set(player.opponents) for player in tournament.players.values()}
+            possible = has_rematch_free_pairing(sorted(opponents), opponents)
+
+            pairings = tournament.pair_next_round()
+            paired = [player_id for pairing in pairings for player_id in (pairing["white"], pairing["black"])]
+            assert sorted(paired) == list(range(count))
+            if possible:
+                assert all(pairing["black"] not in opponents[pairing["white"]] for pairing in pairings)
+
+            for pairing in pairings:
+                tournament.record_result(pairing["white"], pairing["black"], rng.choice(list(RESULT_POINTS)))
+
+
+def test_tie_breaks_match_full_recount():
+    rng = random.Random(3)
+    players = [TournamentPlayer(i, f"p{i}", rng.randint(1000, 2000)) for i in range(41)]
+    tournament = Tournament(1, "Test", players, rounds=7)
+    for _ in range(7):
+        for pairing in tournament.pair_next_round():
+            if pairing["black"] is not None:
+                tournament.record_result(pairing["white"], pairing["black"], rng.choice(list(RESULT_POINTS)))
+
+    for player in tournament.players.values():
+        assert player.buchholz == sum(tournament.players[opponent].score for opponent, _ in player.games)
+        assert player.sonneborn_berger == sum(points * tournament.players[opponent].score
+                                              for opponent, points in player.games)